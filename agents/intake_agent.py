@@ -22,6 +22,7 @@ Prompt Engineering:
     - JSON mode for structured output parsing
     - Dynamic context based on collected data so far
 """
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
 import json
 import re
@@ -116,6 +117,96 @@ ISSUE_KEYWORDS = {
     "sleep_issues": ["can't sleep", "insomnia", "restless", "waking up", "sleep problems", "tired but can't sleep"],
 }
 
+# First number in a string, e.g. "about 7.5 hours" -> "7.5"
+_NUMBER_RE = re.compile(r"\d+\.?\d*")
+
+
+def _first_number(text: str) -> Optional[float]:
+    """Extract the first number from a string."""
+    match = _NUMBER_RE.search(text)
+    return float(match.group()) if match else None
+
+
+# Answers repeat a lot ("8", "5-6", "about 7"), so parses are cached on
+# the normalized (lowercased, stripped) text
+@lru_cache(maxsize=512)
+def _parse_int_text(s: str) -> Optional[int]:
+    """Int parsing behind IntakeAgent._parse_int."""
+    try:
+        # Handle "8 out of 10" → extract first number
+        if " out of " in s:
+            s = s.split(" out of ")[0].strip()
+        
+        # Handle "4 or 5" → take average
+        if " or " in s:
+            parts = s.split(" or ")
+            try:
+                nums = [_first_number(p) for p in parts]
+                nums = [n for n in nums if n is not None]
+                if nums:
+                    return int(round(sum(nums) / len(nums)))
+            except (ValueError, ZeroDivisionError):
+                pass
+        
+        # Handle "8/10" → extract numerator (first number)
+        if "/" in s:
+            s = s.split("/")[0].strip()
+        
+        # Handle "5-6" → average
+        if "-" in s and not s.startswith("-"):
+            parts = s.split("-")
+            try:
+                nums = [float(p.strip()) for p in parts if p.strip().replace(".", "").isdigit()]
+                if nums:
+                    return int(round(sum(nums) / len(nums)))
+            except (ValueError, ZeroDivisionError):
+                pass
+        
+        # Extract first number from string
+        match = _NUMBER_RE.search(s)
+        if match:
+            return int(round(float(match.group())))
+        
+        return None
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+
+@lru_cache(maxsize=512)
+def _parse_float_text(s: str) -> Optional[float]:
+    """Float parsing behind IntakeAgent._parse_float."""
+    try:
+        # Handle "X out of Y" → extract first number
+        if " out of " in s:
+            s = s.split(" out of ")[0].strip()
+        
+        # Handle "X or Y" → average
+        if " or " in s:
+            parts = s.split(" or ")
+            try:
+                nums = [_first_number(p) for p in parts]
+                nums = [n for n in nums if n is not None]
+                if nums:
+                    return sum(nums) / len(nums)
+            except (ValueError, ZeroDivisionError):
+                pass
+        
+        # Handle "X-Y" range → average
+        if "-" in s and not s.startswith("-"):
+            parts = s.split("-")
+            try:
+                nums = [float(p.strip()) for p in parts if p.strip().replace(".", "").isdigit()]
+                if nums:
+                    return sum(nums) / len(nums)
+            except (ValueError, ZeroDivisionError):
+                pass
+        
+        # Extract first number
+        match = _NUMBER_RE.search(s)
+        return float(match.group()) if match else None
+    except (ValueError, AttributeError, TypeError, ZeroDivisionError):
+        return None
+
 
 class IntakeAgent:
     """Symptom-aware agent that asks only relevant questions."""
@@ -701,84 +792,18 @@ FOCUS: Compare their stats to clinical ideals for their age/sex."""
     def _parse_int(self, value: Any) -> Optional[int]:
         """Robust int parsing: handles '5-6' (avg), '8/10' (numerator), '8 out of 10' (numerator), '4 or 5' (avg)."""
         try:
-            s = str(value).lower().strip()
-            
-            # Handle "8 out of 10" → extract first number
-            if " out of " in s:
-                s = s.split(" out of ")[0].strip()
-            
-            # Handle "4 or 5" → take average
-            if " or " in s:
-                parts = s.split(" or ")
-                try:
-                    nums = [self._extract_first_number(p) for p in parts]
-                    nums = [n for n in nums if n is not None]
-                    if nums:
-                        return int(round(sum(nums) / len(nums)))
-                except (ValueError, ZeroDivisionError):
-                    pass
-            
-            # Handle "8/10" → extract numerator (first number)
-            if "/" in s:
-                s = s.split("/")[0].strip()
-            
-            # Handle "5-6" → average
-            if "-" in s and not s.startswith("-"):
-                parts = s.split("-")
-                try:
-                    nums = [float(p.strip()) for p in parts if p.strip().replace(".", "").isdigit()]
-                    if nums:
-                        return int(round(sum(nums) / len(nums)))
-                except (ValueError, ZeroDivisionError):
-                    pass
-            
-            # Extract first number from string
-            match = re.search(r"\d+\.?\d*", s)
-            if match:
-                return int(round(float(match.group())))
-            
-            return None
+            return _parse_int_text(str(value).lower().strip())
         except (ValueError, AttributeError, TypeError):
             return None
     
     def _extract_first_number(self, text: str) -> Optional[float]:
         """Extract the first number from a string."""
-        match = re.search(r"\d+\.?\d*", text)
-        return float(match.group()) if match else None
+        return _first_number(text)
 
     def _parse_float(self, value: Any) -> Optional[float]:
         """Robust float parsing for decimals and ranges."""
         try:
-            s = str(value).lower().strip()
-            
-            # Handle "X out of Y" → extract first number
-            if " out of " in s:
-                s = s.split(" out of ")[0].strip()
-            
-            # Handle "X or Y" → average
-            if " or " in s:
-                parts = s.split(" or ")
-                try:
-                    nums = [self._extract_first_number(p) for p in parts]
-                    nums = [n for n in nums if n is not None]
-                    if nums:
-                        return sum(nums) / len(nums)
-                except (ValueError, ZeroDivisionError):
-                    pass
-            
-            # Handle "X-Y" range → average
-            if "-" in s and not s.startswith("-"):
-                parts = s.split("-")
-                try:
-                    nums = [float(p.strip()) for p in parts if p.strip().replace(".", "").isdigit()]
-                    if nums:
-                        return sum(nums) / len(nums)
-                except (ValueError, ZeroDivisionError):
-                    pass
-            
-            # Extract first number
-            match = re.search(r"\d+\.?\d*", s)
-            return float(match.group()) if match else None
+            return _parse_float_text(str(value).lower().strip())
         except (ValueError, AttributeError, TypeError, ZeroDivisionError):
             return None
 
@@ -26,9 +26,12 @@ Prompt Engineering:
     - Structured JSON Output: Reliable parsing of insights
     - Confidence Scoring: Self-assessment for response quality
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, Final, List, Optional, Tuple
+from functools import lru_cache
+from collections import namedtuple
 import json
 import re
+import string
 import logging
 from config.llm import get_gemini_model
 
@@ -46,7 +49,7 @@ SAFETY_KEYWORDS = {
 
 # Trusted medical domains with authority scores (ML-based ranking)
 # Score: 10 = Peer-reviewed research, 9 = Government health, 8 = Academic medical centers, 7 = Trusted foundations
-TRUSTED_DOMAINS = {
+TRUSTED_DOMAINS: Final[Dict[str, int]] = {
     # Tier 1: Peer-Reviewed Research (Score: 10)
     "pubmed.ncbi.nlm.nih.gov": 10,
     "nih.gov": 10,
@@ -73,14 +76,23 @@ TRUSTED_DOMAINS = {
     "diabetes.org": 7,  # American Diabetes Association
     "cancer.org": 7,  # American Cancer Society
 }
+TRUSTED_DOMAIN_SET = frozenset(TRUSTED_DOMAINS)
+# Highest authority first, so substring matching prefers the strongest source
+TRUSTED_DOMAINS_RANKED = tuple(sorted(TRUSTED_DOMAINS.items(), key=lambda item: -item[1]))
 
 # Minimum quality thresholds for research loop
-MIN_AUTHORITY_SCORE = 7  # Minimum average authority score
-MIN_SOURCES_REQUIRED = 2  # Minimum number of quality sources
-MAX_RESEARCH_ITERATIONS = 3  # Maximum research refinement loops
+MIN_AUTHORITY_SCORE: Final = 7  # Minimum average authority score
+MIN_SOURCES_REQUIRED: Final = 2  # Minimum number of quality sources
+MAX_RESEARCH_ITERATIONS: Final = 3  # Maximum research refinement loops
+
+# One entry per research iteration (lighter than a dict; see ResearchAgent.run)
+IterationLog = namedtuple(
+    "IterationLog",
+    "iteration sources_found quality_score authority_score relevance_score trusted_sources",
+)
 
 # Issue-specific recommendation focus
-ISSUE_FOCUS = {
+ISSUE_FOCUS: Final[Dict[str, Dict[str, Any]]] = {
     "mental_fatigue": {
         "title": "Mental Clarity",
         "focus": ["sleep quality", "stress levels", "hydration"],
@@ -156,6 +168,226 @@ ISSUE_FOCUS = {
 }
 
 
+# Search refinement suffixes for research retries, indexed by
+# (few_sources << 1) | low_relevance. {n} is the previous trusted-source count.
+_REFINE_HEADER = "\n\n=== SEARCH REFINEMENT (CRITICAL) ===\n"
+_REFINE_FEW_SOURCES = (
+    "Previous search found only {n} trusted sources. "
+    "PRIORITIZE searching these domains:\n"
+    "- site:pubmed.ncbi.nlm.nih.gov\n"
+    "- site:nih.gov\n"
+    "- site:mayoclinic.org\n"
+    "- site:harvard.edu\n\n"
+)
+_REFINE_LOW_RELEVANCE = (
+    "Previous sources had low relevance. "
+    "Use MORE SPECIFIC search terms related to the user's exact symptoms.\n\n"
+)
+_REFINE_FOCUS = (
+    "Focus on:\n"
+    "1. Peer-reviewed research papers\n"
+    "2. Clinical studies with quantitative results\n"
+    "3. Meta-analyses and systematic reviews\n"
+    "4. Government health agency guidelines\n"
+)
+_REFINEMENT_BLOCKS = tuple(
+    _REFINE_HEADER
+    + (_REFINE_FEW_SOURCES if few_sources else "")
+    + (_REFINE_LOW_RELEVANCE if low_relevance else "")
+    + _REFINE_FOCUS
+    for few_sources in (False, True)
+    for low_relevance in (False, True)
+)
+
+# Check-in lines for the prompt's data summary, in display order
+_BASIC_ROWS = (
+    "Sleep: {} hours",
+    "Water: {} glasses",
+    "Mood: {}/5",
+    "Energy: {}/5",
+    "Stress: {}/10",
+    "Exercise: {} min",
+)
+
+# Advanced MetricsAgent scores as (metrics key, line format)
+_METRIC_ROWS = (
+    ("sleep_quality_score", "Sleep Quality Score: {}/10"),
+    ("sleep_debt_hours", "Sleep Debt: {}h"),
+    ("burnout_risk_score", "Burnout Risk: {}/10"),
+    ("stress_load_index", "Stress Load Index: {}/10"),
+    ("mental_resilience_score", "Mental Resilience: {}/10"),
+    ("dehydration_risk", "Dehydration Risk: {}"),
+    ("sedentary_risk_score", "Sedentary Risk: {}/10"),
+    ("social_wellness_score", "Social Wellness: {}/10"),
+    ("loneliness_risk", "Loneliness Risk: {}"),
+    ("toxin_load_score", "Toxin Load: {}/10"),
+)
+
+# Research prompt scaffold. Per-issue fields ($title, $focus, $evidence) are
+# filled once at import; the rest are substituted per call in _build_prompt.
+_PROMPT_BODY = """You are a health researcher providing TARGETED insights for: $title
+
+ISSUE TYPE: $issue_label
+FOCUS AREAS: $focus
+
+RELEVANT EVIDENCE BASE:
+$evidence
+
+PREFERRED SOURCES:
+NIH, Mayo Clinic, Harvard Health, Cleveland Clinic, PubMed, CDC, WHO.
+Avoid forums, blogs, or unverified commercial sites.
+
+USER (${age}y $sex):
+$data_str
+
+=== CHAIN-OF-THOUGHT REASONING (You MUST follow these steps) ===
+
+**STEP 1: IDENTIFY THE GAP**
+Look at each metric and compare to clinical ideals:
+- Sleep: 7-9h optimal → User has ${sleep}h
+- Water: 8+ glasses optimal → User has $water glasses
+- Stress: <4/10 optimal → User has $stress/10
+
+**STEP 2: FIND THE ROOT CAUSE**
+For the BIGGEST gap, ask: "What biological mechanism explains this symptom?"
+- Sleep deprivation → Prefrontal cortex impairment → Focus issues
+- High stress → Elevated cortisol → Sleep disruption + mood impact
+- Dehydration → Reduced blood volume → Fatigue + cognitive decline
+
+**STEP 3: CONNECT TO USER'S COMPLAINT**
+Link the mechanism DIRECTLY to what they said. Use their words.
+
+**STEP 4: FORMULATE INSIGHT**
+Structure: [Their Data] + [Clinical Ideal] + [Mechanism] + [Their Symptom]
+
+=== SAFETY RULES (CRITICAL) ===
+- Do NOT provide a medical diagnosis.
+- Do NOT name specific diseases as a conclusion.
+- Do NOT recommend medications, supplements, or dosages.
+- Keep language educational and focused on prevention.
+
+=== FEW-SHOT EXAMPLES ===
+
+INPUT: Sleep: 5h, Stress: 8/10, Issue: mental_fatigue
+REASONING:
+- Gap: Sleep is 2h below minimum (7h). This is severe.
+- Mechanism: Acute sleep restriction impairs prefrontal cortex function.
+- Connection: User said "brain fog" - this is classic prefrontal impairment.
+OUTPUT: "Your 5h sleep is well below the 7-9h recommended by major sleep foundations. This acute restriction impairs prefrontal cortex function, directly causing the 'brain fog' you described [1]."
+
+INPUT: Sleep: 8h, Water: 3 glasses, Issue: physical_fatigue
+REASONING:
+- Gap: Water is 5 glasses below optimal (8). Moderate dehydration.
+- Mechanism: 2% dehydration reduces blood volume, heart works harder.
+- Connection: User said "tired" - this matches cardiovascular strain.
+OUTPUT: "At 3 glasses, you're at roughly 40% of optimal hydration. Even mild dehydration increases heart workload, which explains the physical fatigue you're experiencing [1]."
+
+=== CITATION FORMAT (MANDATORY) ===
+EVERY medical claim MUST include a citation number [1], [2], etc.
+
+Examples:
+✓ CORRECT: "Your 5h sleep is below the 7-9h recommended by major sleep foundations [1]."
+✓ CORRECT: "Sleep restriction impairs prefrontal cortex function [2], causing the brain fog you described."
+✗ WRONG: "Sleep is important for health." (no citation)
+✗ WRONG: "Studies show sleep matters." (vague, no specific citation)
+
+Rules:
+1. Cite SPECIFIC claims, not general statements
+2. Use [1], [2], [3] format
+3. Each citation should reference a grounded source
+4. Prioritize peer-reviewed sources over general health sites
+
+"""
+
+# Structured-output instructions shared by every research prompt
+_OUTPUT_JSON_TAIL = """=== YOUR OUTPUT ===
+OUTPUT JSON:
+{
+  "reasoning": "Brief chain-of-thought explaining which metrics are most concerning and why (2-3 sentences)",
+  "insights": [
+    "Insight 1: [User's Data] + [Clinical Ideal] + [Biological Mechanism] + [Citation]",
+    "Insight 2: [User's Data] + [Clinical Ideal] + [Biological Mechanism] + [Citation]",
+    "Insight 3: [User's Data] + [Clinical Ideal] + [Biological Mechanism] + [Citation]"
+  ],
+  "confidence": 0.0-1.0 (how confident you are in the quality of sources found)
+}
+
+Generate 2-4 insights maximum. Focus on the MOST IMPACTFUL findings."""
+
+_PROMPT_SCAFFOLD = _PROMPT_BODY + _OUTPUT_JSON_TAIL
+
+
+# Per-issue focus/evidence text, joined once at import
+_FOCUS_JOINED: Dict[str, str] = {k: ", ".join(v["focus"]) for k, v in ISSUE_FOCUS.items()}
+_EVIDENCE_JOINED: Dict[str, str] = {
+    k: "\n".join("- " + e for e in v["evidence"]) for k, v in ISSUE_FOCUS.items()
+}
+
+
+def _render_static(issue_type: str) -> str:
+    """Fill the issue-specific parts of the prompt scaffold."""
+    def escape(text: str) -> str:
+        return text.replace("$", "$$")
+
+    return string.Template(_PROMPT_SCAFFOLD).safe_substitute(
+        title=escape(ISSUE_FOCUS[issue_type]["title"]),
+        focus=escape(_FOCUS_JOINED[issue_type]),
+        evidence=escape(_EVIDENCE_JOINED[issue_type]),
+    )
+
+
+_PROMPT_TEMPLATES: Dict[str, string.Template] = {
+    k: string.Template(_render_static(k)) for k in ISSUE_FOCUS
+}
+
+
+@lru_cache(maxsize=512, typed=True)
+def _fallback_insights(issue_type: str, sleep: Optional[float], water: Optional[int],
+                       stress: Optional[int]) -> Tuple[str, ...]:
+    """Rule-based insights for ResearchAgent._fallback.
+
+    Pure over its inputs, so repeated check-ins with the same values are
+    served from the cache. ``typed=True`` keeps 7 and 7.0 apart since the
+    value is echoed back in the text.
+    """
+    insights = []
+    
+    if issue_type == "mental_fatigue":
+        if sleep and sleep < 7:
+            insights.append(f"Your {sleep}h of sleep is likely impacting your mental clarity. The brain consolidates memories and clears toxins during deep sleep.")
+        if stress and stress > 5:
+            insights.append(f"High stress ({stress}/10) elevates cortisol, which impairs focus and memory. Consider a brief breathing exercise.")
+        if water and water < 6:
+            insights.append(f"At {water} glasses, dehydration may be contributing to brain fog. Even mild dehydration reduces cognitive performance.")
+            
+    elif issue_type == "emotional":
+        if sleep and sleep < 7:
+            insights.append(f"Sleep deprivation ({sleep}h) amplifies negative emotions by increasing amygdala reactivity.")
+        if stress and stress > 5:
+            insights.append(f"Your stress level ({stress}/10) is elevated. Physical movement, even a 10-min walk, can help regulate mood.")
+            
+    elif issue_type == "physical_fatigue":
+        if sleep and sleep < 7:
+            insights.append(f"Your {sleep}h of sleep limits physical recovery. Muscles repair and energy restores during deep sleep.")
+        if water and water < 6:
+            insights.append(f"{water} glasses of water is below optimal. Dehydration makes your heart work harder, reducing energy.")
+            
+    elif issue_type == "sleep_issues":
+        if stress and stress > 5:
+            insights.append(f"High stress ({stress}/10) suppresses melatonin production, making it harder to fall asleep.")
+    
+    else:  # general_wellness
+        if sleep and sleep >= 7:
+            insights.append(f"Great job on {sleep}h of sleep! You're in the optimal range.")
+        if water and water >= 8:
+            insights.append(f"You're well-hydrated at {water} glasses.")
+    
+    if not insights:
+        insights = ["Based on the data collected, let's focus on building consistent healthy habits."]
+    
+    return tuple(insights)
+
+
 class ResearchAgent:
     """Generates issue-targeted health insights with Day 4 enhancements."""
 
@@ -184,7 +416,7 @@ class ResearchAgent:
             iteration = 0
             best_response = None
             best_quality_score = 0
-            research_log = []  # Track all research attempts for transparency
+            research_log: List[IterationLog] = []  # Track all research attempts for transparency
             
             while iteration < MAX_RESEARCH_ITERATIONS:
                 iteration += 1
@@ -218,15 +450,14 @@ class ResearchAgent:
                 quality_metrics = self._score_research_quality(sources, context)
                 
                 # Log this iteration
-                iteration_log = {
-                    "iteration": iteration,
-                    "sources_found": len(sources),
-                    "quality_score": quality_metrics["overall_score"],
-                    "authority_score": quality_metrics["avg_authority"],
-                    "relevance_score": quality_metrics["avg_relevance"],
-                    "trusted_sources": quality_metrics["trusted_count"],
-                }
-                research_log.append(iteration_log)
+                research_log.append(IterationLog(
+                    iteration,
+                    len(sources),
+                    quality_metrics["overall_score"],
+                    quality_metrics["avg_authority"],
+                    quality_metrics["avg_relevance"],
+                    quality_metrics["trusted_count"],
+                ))
                 
                 logger.info(
                     f"Iteration {iteration} quality: {quality_metrics['overall_score']:.1f}/100 "
@@ -262,7 +493,7 @@ class ResearchAgent:
                 return self._fallback(context)
             
             # Add research transparency to context
-            context["research_log"] = research_log
+            context["research_log"] = [entry._asdict() for entry in research_log]
             context["research_iterations"] = iteration
             context["research_quality_score"] = best_quality_score
             
@@ -541,7 +772,9 @@ class ResearchAgent:
     
     def _get_authority_score(self, domain: str) -> int:
         """Get authority score for domain (0-10)."""
-        for trusted_domain, score in TRUSTED_DOMAINS.items():
+        if domain in TRUSTED_DOMAIN_SET:
+            return TRUSTED_DOMAINS[domain]
+        for trusted_domain, score in TRUSTED_DOMAINS_RANKED:
             if trusted_domain in domain:
                 return score
         return 0  # Untrusted source
@@ -660,35 +893,14 @@ class ResearchAgent:
             return base_prompt
         
         # Analyze previous iterations
-        prev_iteration = research_log[-1] if research_log else {}
-        
-        refinement_instructions = "\n\n=== SEARCH REFINEMENT (CRITICAL) ===\n"
-        
-        if prev_iteration.get("trusted_sources", 0) < MIN_SOURCES_REQUIRED:
-            refinement_instructions += (
-                f"Previous search found only {prev_iteration.get('trusted_sources', 0)} trusted sources. "
-                "PRIORITIZE searching these domains:\n"
-                "- site:pubmed.ncbi.nlm.nih.gov\n"
-                "- site:nih.gov\n"
-                "- site:mayoclinic.org\n"
-                "- site:harvard.edu\n\n"
-            )
+        prev_iteration = research_log[-1] if research_log else None
+        trusted_sources = prev_iteration.trusted_sources if prev_iteration else 0
+        relevance_score = prev_iteration.relevance_score if prev_iteration else 0
         
-        if prev_iteration.get("relevance_score", 0) < 50:
-            refinement_instructions += (
-                "Previous sources had low relevance. "
-                "Use MORE SPECIFIC search terms related to the user's exact symptoms.\n\n"
-            )
-        
-        refinement_instructions += (
-            "Focus on:\n"
-            "1. Peer-reviewed research papers\n"
-            "2. Clinical studies with quantitative results\n"
-            "3. Meta-analyses and systematic reviews\n"
-            "4. Government health agency guidelines\n"
-        )
-        
-        return base_prompt + refinement_instructions
+        few_sources = trusted_sources < MIN_SOURCES_REQUIRED
+        low_relevance = relevance_score < 50
+        block = _REFINEMENT_BLOCKS[(few_sources << 1) | low_relevance]
+        return base_prompt + block.format(n=trusted_sources)
 
     def _build_prompt(self, context: Dict[str, Any]) -> str:
         """Build issue-aware prompt for targeted recommendations."""
@@ -698,150 +910,49 @@ class ResearchAgent:
         metrics = context.get("metrics", {})
         issue_type = context.get("issue_type", "general_wellness")
         
-        # Get issue-specific focus
-        issue_info = ISSUE_FOCUS.get(issue_type, ISSUE_FOCUS["general_wellness"])
-        
         # Normalize data (handle field mismatches)
-        sleep = checkin.get('sleep_hours')
-        water = checkin.get('water_glasses')
-        mood = checkin.get('mood_score') if 'mood_score' in checkin else checkin.get('mood', 3)
-        energy = checkin.get('energy_score') if 'energy_score' in checkin else checkin.get('energy_level', 3)
-        stress = checkin.get('stress_score', 5)
-        exercise = checkin.get('exercise_minutes')
+        c_get = checkin.get
+        sleep = c_get('sleep_hours')
+        water = c_get('water_glasses')
+        mood = c_get('mood_score', c_get('mood', 3))
+        energy = c_get('energy_score', c_get('energy_level', 3))
+        stress = c_get('stress_score', 5)
+        exercise = c_get('exercise_minutes')
         
         # Profile info
         age = profile.get('age', 30)
         sex = profile.get('sex', 'unknown')
         
         # Build comprehensive data summary (include new MetricsAgent scores)
-        data_lines = []
-        
-        # Basic metrics
-        if sleep is not None:
-            data_lines.append(f"Sleep: {sleep} hours")
-        if water is not None:
-            data_lines.append(f"Water: {water} glasses")
-        if mood is not None:
-            data_lines.append(f"Mood: {mood}/5")
-        if energy is not None:
-            data_lines.append(f"Energy: {energy}/5")
-        if stress is not None:
-            data_lines.append(f"Stress: {stress}/10")
-        if exercise is not None:
-            data_lines.append(f"Exercise: {exercise} min")
-        
-        # Advanced MetricsAgent scores (NEW)
-        if metrics.get("sleep_quality_score"):
-            data_lines.append(f"Sleep Quality Score: {metrics['sleep_quality_score']}/10")
-        if metrics.get("sleep_debt_hours"):
-            data_lines.append(f"Sleep Debt: {metrics['sleep_debt_hours']}h")
-        if metrics.get("burnout_risk_score"):
-            data_lines.append(f"Burnout Risk: {metrics['burnout_risk_score']}/10")
-        if metrics.get("stress_load_index"):
-            data_lines.append(f"Stress Load Index: {metrics['stress_load_index']}/10")
-        if metrics.get("mental_resilience_score"):
-            data_lines.append(f"Mental Resilience: {metrics['mental_resilience_score']}/10")
-        if metrics.get("dehydration_risk"):
-            data_lines.append(f"Dehydration Risk: {metrics['dehydration_risk']}")
-        if metrics.get("sedentary_risk_score"):
-            data_lines.append(f"Sedentary Risk: {metrics['sedentary_risk_score']}/10")
-        if metrics.get("social_wellness_score"):
-            data_lines.append(f"Social Wellness: {metrics['social_wellness_score']}/10")
-        if metrics.get("loneliness_risk"):
-            data_lines.append(f"Loneliness Risk: {metrics['loneliness_risk']}")
-        if metrics.get("toxin_load_score"):
-            data_lines.append(f"Toxin Load: {metrics['toxin_load_score']}/10")
+        basic_values = (sleep, water, mood, energy, stress, exercise)
+        data_lines = [
+            fmt.format(value)
+            for fmt, value in zip(_BASIC_ROWS, basic_values)
+            if value is not None
+        ]
+        # Advanced MetricsAgent scores (only reported when non-zero)
+        m_get = metrics.get
+        data_lines.extend(
+            fmt.format(value)
+            for key, fmt in _METRIC_ROWS
+            if (value := m_get(key))
+        )
         
         data_str = "\n".join(data_lines) if data_lines else "Limited data collected"
         
         # Get benchmarks
         # ideals = metrics.get("ideals", {}) # Future use
         
-        return f"""You are a health researcher providing TARGETED insights for: {issue_info['title']}
-
-ISSUE TYPE: {issue_type.upper().replace('_', ' ')}
-FOCUS AREAS: {', '.join(issue_info['focus'])}
-
-RELEVANT EVIDENCE BASE:
-{chr(10).join('- ' + e for e in issue_info['evidence'])}
-
-PREFERRED SOURCES:
-NIH, Mayo Clinic, Harvard Health, Cleveland Clinic, PubMed, CDC, WHO.
-Avoid forums, blogs, or unverified commercial sites.
-
-USER ({age}y {sex}):
-{data_str}
-
-=== CHAIN-OF-THOUGHT REASONING (You MUST follow these steps) ===
-
-**STEP 1: IDENTIFY THE GAP**
-Look at each metric and compare to clinical ideals:
-- Sleep: 7-9h optimal → User has {sleep if sleep is not None else 'unknown'}h
-- Water: 8+ glasses optimal → User has {water if water is not None else 'unknown'} glasses
-- Stress: <4/10 optimal → User has {stress if stress is not None else 'unknown'}/10
-
-**STEP 2: FIND THE ROOT CAUSE**
-For the BIGGEST gap, ask: "What biological mechanism explains this symptom?"
-- Sleep deprivation → Prefrontal cortex impairment → Focus issues
-- High stress → Elevated cortisol → Sleep disruption + mood impact
-- Dehydration → Reduced blood volume → Fatigue + cognitive decline
-
-**STEP 3: CONNECT TO USER'S COMPLAINT**
-Link the mechanism DIRECTLY to what they said. Use their words.
-
-**STEP 4: FORMULATE INSIGHT**
-Structure: [Their Data] + [Clinical Ideal] + [Mechanism] + [Their Symptom]
-
-=== SAFETY RULES (CRITICAL) ===
-- Do NOT provide a medical diagnosis.
-- Do NOT name specific diseases as a conclusion.
-- Do NOT recommend medications, supplements, or dosages.
-- Keep language educational and focused on prevention.
-
-=== FEW-SHOT EXAMPLES ===
-
-INPUT: Sleep: 5h, Stress: 8/10, Issue: mental_fatigue
-REASONING:
-- Gap: Sleep is 2h below minimum (7h). This is severe.
-- Mechanism: Acute sleep restriction impairs prefrontal cortex function.
-- Connection: User said "brain fog" - this is classic prefrontal impairment.
-OUTPUT: "Your 5h sleep is well below the 7-9h recommended by major sleep foundations. This acute restriction impairs prefrontal cortex function, directly causing the 'brain fog' you described [1]."
-
-INPUT: Sleep: 8h, Water: 3 glasses, Issue: physical_fatigue
-REASONING:
-- Gap: Water is 5 glasses below optimal (8). Moderate dehydration.
-- Mechanism: 2% dehydration reduces blood volume, heart works harder.
-- Connection: User said "tired" - this matches cardiovascular strain.
-OUTPUT: "At 3 glasses, you're at roughly 40% of optimal hydration. Even mild dehydration increases heart workload, which explains the physical fatigue you're experiencing [1]."
-
-=== CITATION FORMAT (MANDATORY) ===
-EVERY medical claim MUST include a citation number [1], [2], etc.
-
-Examples:
-✓ CORRECT: "Your 5h sleep is below the 7-9h recommended by major sleep foundations [1]."
-✓ CORRECT: "Sleep restriction impairs prefrontal cortex function [2], causing the brain fog you described."
-✗ WRONG: "Sleep is important for health." (no citation)
-✗ WRONG: "Studies show sleep matters." (vague, no specific citation)
-
-Rules:
-1. Cite SPECIFIC claims, not general statements
-2. Use [1], [2], [3] format
-3. Each citation should reference a grounded source
-4. Prioritize peer-reviewed sources over general health sites
-
-=== YOUR OUTPUT ===
-OUTPUT JSON:
-{{
-  "reasoning": "Brief chain-of-thought explaining which metrics are most concerning and why (2-3 sentences)",
-  "insights": [
-    "Insight 1: [User's Data] + [Clinical Ideal] + [Biological Mechanism] + [Citation]",
-    "Insight 2: [User's Data] + [Clinical Ideal] + [Biological Mechanism] + [Citation]",
-    "Insight 3: [User's Data] + [Clinical Ideal] + [Biological Mechanism] + [Citation]"
-  ],
-  "confidence": 0.0-1.0 (how confident you are in the quality of sources found)
-}}
-
-Generate 2-4 insights maximum. Focus on the MOST IMPACTFUL findings."""
+        template = _PROMPT_TEMPLATES.get(issue_type, _PROMPT_TEMPLATES["general_wellness"])
+        return template.substitute(
+            issue_label=issue_type.upper().replace('_', ' '),
+            age=age,
+            sex=sex,
+            data_str=data_str,
+            sleep=sleep if sleep is not None else 'unknown',
+            water=water if water is not None else 'unknown',
+            stress=stress if stress is not None else 'unknown',
+        )
 
     def _fallback(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Issue-aware fallback."""
@@ -852,40 +963,5 @@ Generate 2-4 insights maximum. Focus on the MOST IMPACTFUL findings."""
         water = checkin.get('water_glasses')
         stress = checkin.get('stress_score')
         
-        insights = []
-        
-        if issue_type == "mental_fatigue":
-            if sleep and sleep < 7:
-                insights.append(f"Your {sleep}h of sleep is likely impacting your mental clarity. The brain consolidates memories and clears toxins during deep sleep.")
-            if stress and stress > 5:
-                insights.append(f"High stress ({stress}/10) elevates cortisol, which impairs focus and memory. Consider a brief breathing exercise.")
-            if water and water < 6:
-                insights.append(f"At {water} glasses, dehydration may be contributing to brain fog. Even mild dehydration reduces cognitive performance.")
-                
-        elif issue_type == "emotional":
-            if sleep and sleep < 7:
-                insights.append(f"Sleep deprivation ({sleep}h) amplifies negative emotions by increasing amygdala reactivity.")
-            if stress and stress > 5:
-                insights.append(f"Your stress level ({stress}/10) is elevated. Physical movement, even a 10-min walk, can help regulate mood.")
-                
-        elif issue_type == "physical_fatigue":
-            if sleep and sleep < 7:
-                insights.append(f"Your {sleep}h of sleep limits physical recovery. Muscles repair and energy restores during deep sleep.")
-            if water and water < 6:
-                insights.append(f"{water} glasses of water is below optimal. Dehydration makes your heart work harder, reducing energy.")
-                
-        elif issue_type == "sleep_issues":
-            if stress and stress > 5:
-                insights.append(f"High stress ({stress}/10) suppresses melatonin production, making it harder to fall asleep.")
-        
-        else:  # general_wellness
-            if sleep and sleep >= 7:
-                insights.append(f"Great job on {sleep}h of sleep! You're in the optimal range.")
-            if water and water >= 8:
-                insights.append(f"You're well-hydrated at {water} glasses.")
-        
-        if not insights:
-            insights = ["Based on the data collected, let's focus on building consistent healthy habits."]
-            
-        context["insights"] = insights
+        context["insights"] = list(_fallback_insights(issue_type, sleep, water, stress))
         return context
@@ -3,19 +3,38 @@
 This module handles Gemini model initialization with appropriate safety settings.
 """
 import logging
+from functools import lru_cache
 from pathlib import Path
-import google.generativeai as genai
+from typing import TYPE_CHECKING, Optional
 from config.settings import GOOGLE_API_KEY
 
+if TYPE_CHECKING:
+    from google.generativeai import GenerativeModel
+
 logger = logging.getLogger(__name__)
 
-def get_gemini_model(model_name: str = "gemini-2.0-flash"):
+# Standard safety settings for a health agent. Built once at import and
+# passed straight through; the SDK copies these into its own protos.
+_SAFETY_SETTINGS = (
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+)
+
+
+@lru_cache(maxsize=4)
+def get_gemini_model(model_name: str = "gemini-2.0-flash") -> Optional["GenerativeModel"]:
     """
     Configures and returns a Gemini model instance.
-    
+
+    Instances are cached per model name, so every agent shares one model
+    object instead of rebuilding it on each call. The Gemini SDK is imported
+    on first use, so fallback-only runs never load it.
+
     Args:
         model_name: Gemini model to use (default: gemini-2.0-flash)
-    
+
     Returns:
         GenerativeModel instance or None if API key is missing.
     """
@@ -23,18 +42,11 @@ def get_gemini_model(model_name: str = "gemini-2.0-flash"):
         logger.warning("GOOGLE_API_KEY not set. AI agents will use fallback mode.")
         return None
 
+    import google.generativeai as genai
     genai.configure(api_key=GOOGLE_API_KEY)
 
-    # Standard safety settings for a health agent
-    safety_settings = [
-        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-    ]
-
     model = genai.GenerativeModel(
         model_name=model_name,
-        safety_settings=safety_settings,
+        safety_settings=_SAFETY_SETTINGS,
     )
-    return model
\ No newline at end of file
+    return model
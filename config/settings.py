@@ -15,10 +15,14 @@ GEMINI_MODEL_NAME = "gemini-2.0-flash"
 
 # Paths
 SESSION_STORAGE_PATH = BASE_DIR / ".sessions"
+MAX_CHECKPOINTS_PER_SESSION = 10  # Kept in memory; older ones reload from disk
 
 # Context Engine Settings
 MAX_CONTEXT_TOKENS = 8000
 MAX_RECENT_MESSAGES = 6
+KEEP_RECENT_TOKENS = 4000  # Token budget for messages kept verbatim after compaction
+# "sliding_window" (instant, rule-based summary) or "summarize" (LLM call)
+COMPACTION_STRATEGY = os.getenv("NIRAVA_COMPACTION", "sliding_window")
 
 # Safety & Research Settings
 MIN_AUTHORITY_SCORE = 7
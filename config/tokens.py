@@ -0,0 +1,41 @@
+"""Token counting for context-window budgeting.
+
+Uses tiktoken's cl100k_base BPE when it is installed and falls back to the
+~4 characters per token approximation otherwise.
+"""
+import logging
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Fallback approximation (1 token ≈ 4 chars)
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding() -> Optional["tiktoken.Encoding"]:
+    """Load the BPE encoding once; None if tiktoken is unavailable."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:  # e.g. BPE file can't be fetched offline
+                logger.warning("tiktoken encoding unavailable, using char estimate: %s", e)
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Return the token count of text (exact with tiktoken, else estimated)."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return -(-len(text) // CHARS_PER_TOKEN)  # round up so short messages still count
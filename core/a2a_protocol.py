@@ -12,14 +12,89 @@ Reference: https://github.com/google/A2A
 """
 import json
 import logging
-import uuid
-from typing import Dict, Any, List, Optional, Callable
-from dataclasses import dataclass, field, asdict
+import secrets
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Deque, FrozenSet, List, Optional, Callable, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
+# Optional C-accelerated JSON codec for messages leaving the process
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Upper bound on buffered A2A messages; the oldest are dropped beyond this
+MAX_QUEUED_MESSAGES = 10_000
+
+# Threads shared by every orchestrator for concurrent delegations
+_DELEGATION_WORKERS = 3
+
+# dataclass(slots=True) needs Python 3.10+; older interpreters keep __dict__
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def _new_id() -> str:
+    """Random 128-bit hex identifier (cheaper than str(uuid.uuid4()))."""
+    return secrets.token_hex(16)
+
+
+def _ns_to_iso(ns: int) -> str:
+    """Format a time.time_ns() value as a local ISO-8601 timestamp."""
+    return datetime.fromtimestamp(ns // 1_000_000_000).replace(
+        microsecond=ns // 1_000 % 1_000_000
+    ).isoformat()
+
+
+def _json_default(obj):
+    """Encode read-only mappings (e.g. cached benchmarks) as objects."""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(data: dict) -> str:
+    """Encode to JSON with orjson when installed, else the stdlib."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default).decode()
+    return json.dumps(data, default=_json_default)
+
+
+def _loads(raw) -> dict:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _iso_to_ns(value: str) -> int:
+    """Inverse of _ns_to_iso (microsecond precision)."""
+    return round(datetime.fromisoformat(value).timestamp() * 1_000_000) * 1_000
+
+
+_delegation_executor: Optional[ThreadPoolExecutor] = None
+_delegation_lock = threading.Lock()
+
+
+def _get_delegation_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for orchestrator fan-out, started on first use."""
+    global _delegation_executor
+    if _delegation_executor is None:
+        with _delegation_lock:
+            if _delegation_executor is None:
+                _delegation_executor = ThreadPoolExecutor(
+                    max_workers=_DELEGATION_WORKERS, thread_name_prefix="a2a"
+                )
+    return _delegation_executor
+
 
 # ============================================================================
 # A2A MESSAGE PROTOCOL
@@ -44,21 +119,21 @@ class TaskStatus(Enum):
     DELEGATED = "delegated"
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class A2AMessage:
     """
     Standardized message format for A2A communication.
     
     Follows Google's A2A protocol specification.
     """
-    message_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    message_id: str = field(default_factory=_new_id)
     message_type: str = MessageType.TASK_REQUEST.value
     sender_id: str = ""
     recipient_id: str = ""
-    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    timestamp_ns: int = field(default_factory=time.time_ns)  # formatted lazily
     
     # Task information
-    task_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    task_id: str = field(default_factory=_new_id)
     task_type: str = ""  # e.g., "health_analysis", "metric_calculation"
     
     # Payload
@@ -69,13 +144,44 @@ class A2AMessage:
     result: Dict[str, Any] = field(default_factory=dict)
     error: Optional[str] = None
     
+    @property
+    def timestamp(self) -> str:
+        """Creation time as an ISO-8601 string."""
+        return _ns_to_iso(self.timestamp_ns)
+    
     def to_dict(self) -> dict:
-        return asdict(self)
+        """Serialize the message to a new dict the caller may modify."""
+        return {
+            "message_id": self.message_id,
+            "message_type": self.message_type,
+            "sender_id": self.sender_id,
+            "recipient_id": self.recipient_id,
+            "timestamp": self.timestamp,
+            "task_id": self.task_id,
+            "task_type": self.task_type,
+            "payload": dict(self.payload),
+            "status": self.status,
+            "result": dict(self.result),
+            "error": self.error,
+        }
     
     @classmethod
     def from_dict(cls, data: dict) -> "A2AMessage":
+        data = dict(data)
+        timestamp = data.pop("timestamp", None)
+        if timestamp is not None and "timestamp_ns" not in data:
+            data["timestamp_ns"] = _iso_to_ns(timestamp)
         return cls(**data)
     
+    def to_json(self) -> str:
+        """Serialize for transport between processes."""
+        return _dumps(self.to_dict())
+    
+    @classmethod
+    def from_json(cls, raw) -> "A2AMessage":
+        """Inverse of to_json (accepts str or bytes)."""
+        return cls.from_dict(_loads(raw))
+    
     def create_response(self, result: Dict[str, Any], 
                        status: TaskStatus = TaskStatus.COMPLETED) -> "A2AMessage":
         """Create a response message to this request."""
@@ -94,16 +200,37 @@ class A2AMessage:
 # AGENT CARDS (Capability Declaration)
 # ============================================================================
 
-@dataclass
+# A schema as an immutable (field, type) tuple, in declaration order
+Schema = Tuple[Tuple[str, Any], ...]
+
+
+@dataclass(frozen=True, **_SLOTS)
 class AgentSkill:
-    """A specific skill/capability an agent has."""
+    """A specific skill/capability an agent has.
+    
+    Immutable and hashable (schemas are excluded from the hash), so skills
+    can be deduplicated in sets. Schemas may be passed as dicts and are
+    stored as tuples of items, which keeps skills copyable and picklable.
+    """
     name: str
     description: str
-    input_schema: Dict[str, Any] = field(default_factory=dict)
-    output_schema: Dict[str, Any] = field(default_factory=dict)
+    input_schema: Schema = field(default=(), hash=False)
+    output_schema: Schema = field(default=(), hash=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, "input_schema", tuple(dict(self.input_schema).items()))
+        object.__setattr__(self, "output_schema", tuple(dict(self.output_schema).items()))
+    
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "input_schema": dict(self.input_schema),
+            "output_schema": dict(self.output_schema),
+        }
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class AgentCard:
     """
     Agent Card - Metadata describing an agent's capabilities.
@@ -125,20 +252,49 @@ class AgentCard:
     max_concurrent_tasks: int = 10
     
     # Metadata
-    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    created_at_ns: int = field(default_factory=time.time_ns)
+    
+    # Lookup sets derived from skills/supported_task_types at construction
+    _skill_names: FrozenSet[str] = field(init=False, repr=False, compare=False, default=frozenset())
+    _task_types: FrozenSet[str] = field(init=False, repr=False, compare=False, default=frozenset())
+    # Published JSON, built on first to_json() call; cards are static once registered
+    _cached_json: Optional[str] = field(init=False, repr=False, compare=False, default=None)
+    
+    def __post_init__(self):
+        self._skill_names = frozenset(s.name for s in self.skills)
+        self._task_types = frozenset(self.supported_task_types)
+    
+    @property
+    def created_at(self) -> str:
+        """Registration time as an ISO-8601 string."""
+        return _ns_to_iso(self.created_at_ns)
     
     def to_dict(self) -> dict:
-        result = asdict(self)
-        result['skills'] = [asdict(s) for s in self.skills]
-        return result
+        return {
+            "agent_id": self.agent_id,
+            "name": self.name,
+            "description": self.description,
+            "version": self.version,
+            "skills": [s.to_dict() for s in self.skills],
+            "supported_task_types": list(self.supported_task_types),
+            "accepts_delegation": self.accepts_delegation,
+            "max_concurrent_tasks": self.max_concurrent_tasks,
+            "created_at": self.created_at,
+        }
+    
+    def to_json(self) -> str:
+        """Serialize the card for publishing to remote registries."""
+        if self._cached_json is None:
+            self._cached_json = _dumps(self.to_dict())
+        return self._cached_json
     
     def has_skill(self, skill_name: str) -> bool:
         """Check if agent has a specific skill."""
-        return any(s.name == skill_name for s in self.skills)
+        return skill_name in self._skill_names
     
     def can_handle(self, task_type: str) -> bool:
         """Check if agent can handle a specific task type."""
-        return task_type in self.supported_task_types
+        return task_type in self._task_types
 
 
 # ============================================================================
@@ -156,20 +312,50 @@ class AgentRegistry:
     def __init__(self):
         self._agents: Dict[str, AgentCard] = {}
         self._handlers: Dict[str, Callable] = {}  # agent_id -> handler function
-        self._message_queue: List[A2AMessage] = []
+        self._message_queue: Deque[A2AMessage] = deque(maxlen=MAX_QUEUED_MESSAGES)
+        # Inverted indexes for discovery, kept in registration order
+        self._skill_index: Dict[str, List[str]] = defaultdict(list)  # skill -> agent_ids
+        self._task_index: Dict[str, List[str]] = defaultdict(list)  # task_type -> agent_ids
     
     def register(self, card: AgentCard, handler: Callable = None):
         """Register an agent with the registry."""
+        if card.agent_id in self._agents:
+            self._unindex(self._agents[card.agent_id])
         self._agents[card.agent_id] = card
+        for skill_name in dict.fromkeys(s.name for s in card.skills):
+            self._skill_index[skill_name].append(card.agent_id)
+        for task_type in dict.fromkeys(card.supported_task_types):
+            self._task_index[task_type].append(card.agent_id)
         if handler:
             self._handlers[card.agent_id] = handler
         logger.info(f"A2A: Registered agent '{card.name}' ({card.agent_id})")
     
     def unregister(self, agent_id: str):
         """Remove an agent from the registry."""
-        self._agents.pop(agent_id, None)
+        card = self._agents.pop(agent_id, None)
+        if card:
+            self._unindex(card)
         self._handlers.pop(agent_id, None)
     
+    def _unindex(self, card: AgentCard):
+        """Drop an agent's entries from the skill/task indexes."""
+        for index, keys in ((self._skill_index, [s.name for s in card.skills]),
+                            (self._task_index, card.supported_task_types)):
+            for key in dict.fromkeys(keys):
+                agent_ids = index.get(key)
+                if agent_ids and card.agent_id in agent_ids:
+                    agent_ids.remove(card.agent_id)
+                    if not agent_ids:
+                        del index[key]
+    
+    def enqueue(self, message: A2AMessage):
+        """Buffer a message for later delivery (oldest dropped when full)."""
+        self._message_queue.append(message)
+    
+    def dequeue(self) -> Optional[A2AMessage]:
+        """Pop the oldest buffered message, or None if the queue is empty."""
+        return self._message_queue.popleft() if self._message_queue else None
+    
     def get_agent(self, agent_id: str) -> Optional[AgentCard]:
         """Get an agent's card by ID."""
         return self._agents.get(agent_id)
@@ -180,11 +366,11 @@ class AgentRegistry:
     
     def find_by_skill(self, skill_name: str) -> List[AgentCard]:
         """Find agents that have a specific skill."""
-        return [a for a in self._agents.values() if a.has_skill(skill_name)]
+        return [self._agents[aid] for aid in self._skill_index.get(skill_name, ())]
     
     def find_by_task_type(self, task_type: str) -> List[AgentCard]:
         """Find agents that can handle a specific task type."""
-        return [a for a in self._agents.values() if a.can_handle(task_type)]
+        return [self._agents[aid] for aid in self._task_index.get(task_type, ())]
     
     def route_message(self, message: A2AMessage) -> Optional[A2AMessage]:
         """
@@ -292,70 +478,102 @@ class A2AAgent:
 class A2AMetricsAgent(A2AAgent):
     """A2A-enabled Metrics Agent."""
     
+    # Skills are frozen, so one tuple is built per class at import and
+    # shared by every card this agent publishes
+    _SKILLS = (
+        AgentSkill(
+            name="calculate_bmi",
+            description="Calculate Body Mass Index",
+            input_schema={"weight_kg": "float", "height_cm": "float"},
+            output_schema={"bmi": "float", "category": "string"}
+        ),
+        AgentSkill(
+            name="calculate_bmr",
+            description="Calculate Basal Metabolic Rate",
+            input_schema={"weight_kg": "float", "height_cm": "float", "age": "int", "sex": "string"},
+            output_schema={"bmr": "float"}
+        ),
+        AgentSkill(
+            name="get_benchmarks",
+            description="Get clinical benchmarks for age/sex",
+            input_schema={"age": "int", "sex": "string"},
+            output_schema={"benchmarks": "object"}
+        ),
+    )
+    
     def __init__(self, registry: AgentRegistry):
+        # Tool functions are resolved on the first message, not at construction
+        self.calc_bmi = None
+        self.calc_bmr = None
+        self.get_benchmarks = None
+        self.bmi_category = None
+        self._tools_loaded = False
+        self._tools_lock = threading.Lock()
+        super().__init__(registry)
+    
+    def _ensure_tools(self):
+        """Import the health metrics tools on first use."""
+        if self._tools_loaded:
+            return
+        with self._tools_lock:
+            if not self._tools_loaded:
+                self._load_tools()
+    
+    def _load_tools(self):
+        """Resolve the tool functions (called once, under _tools_lock)."""
         try:
             from tools.health_metrics import (
-                calc_bmi, calc_bmr_mifflin, get_ideal_benchmarks
+                calc_bmi, calc_bmr_mifflin, get_ideal_benchmarks, bmi_category
             )
             self.calc_bmi = calc_bmi
             self.calc_bmr = calc_bmr_mifflin
             self.get_benchmarks = get_ideal_benchmarks
+            self.bmi_category = bmi_category
         except ImportError:
             # Fallback implementations for demo
             self.calc_bmi = lambda w, h: round(w / ((h/100) ** 2), 1) if w and h else None
             self.calc_bmr = lambda w, h, a, s: 1500  # Stub
             self.get_benchmarks = lambda a, s: {"sleep": "7-9h", "water": "8 glasses"}
+            self.bmi_category = lambda bmi: "normal" if bmi and 18.5 <= bmi <= 25 else "check"
             logger.warning("Health metrics tools not available - using stubs")
-        super().__init__(registry)
+        # BMR depends only on a handful of small-cardinality inputs, so repeat
+        # analyses for the same profile are served from cache (benchmarks are
+        # already cached inside get_ideal_benchmarks)
+        self.calc_bmr = lru_cache(maxsize=256)(self.calc_bmr)
+        # Set last so concurrent handlers never see a partially loaded agent
+        self._tools_loaded = True
     
     def _create_card(self) -> AgentCard:
         return AgentCard(
             agent_id="metrics_agent",
             name="Metrics Agent",
             description="Calculates health metrics like BMI, BMR, and clinical benchmarks",
-            skills=[
-                AgentSkill(
-                    name="calculate_bmi",
-                    description="Calculate Body Mass Index",
-                    input_schema={"weight_kg": "float", "height_cm": "float"},
-                    output_schema={"bmi": "float", "category": "string"}
-                ),
-                AgentSkill(
-                    name="calculate_bmr",
-                    description="Calculate Basal Metabolic Rate",
-                    input_schema={"weight_kg": "float", "height_cm": "float", "age": "int", "sex": "string"},
-                    output_schema={"bmr": "float"}
-                ),
-                AgentSkill(
-                    name="get_benchmarks",
-                    description="Get clinical benchmarks for age/sex",
-                    input_schema={"age": "int", "sex": "string"},
-                    output_schema={"benchmarks": "object"}
-                )
-            ],
+            skills=list(self._SKILLS),
             supported_task_types=["calculate_bmi", "calculate_bmr", "get_benchmarks", "health_snapshot"]
         )
     
     def _handle_message(self, message: A2AMessage) -> A2AMessage:
         task_type = message.task_type
         payload = message.payload
+        self._ensure_tools()
         
         if task_type == "calculate_bmi":
             bmi = self.calc_bmi(payload.get("weight_kg"), payload.get("height_cm"))
-            try:
-                from tools.health_metrics import bmi_category
-                category = bmi_category(bmi)
-            except ImportError:
-                category = "normal" if bmi and 18.5 <= bmi <= 25 else "check"
-            result = {"bmi": bmi, "category": category}
+            result = {"bmi": bmi, "category": self.bmi_category(bmi)}
             
         elif task_type == "calculate_bmr":
-            bmr = self.calc_bmr(
+            args = (
                 payload.get("weight_kg"),
                 payload.get("height_cm"),
                 payload.get("age"),
                 payload.get("sex")
             )
+            try:
+                hash(args)
+            except TypeError:  # e.g. a list in an untrusted payload; skip the cache
+                bmr = self.calc_bmr.__wrapped__(*args)
+            else:
+                bmr = self.calc_bmr(*args)
             result = {"bmr": bmr}
             
         elif task_type == "get_benchmarks":
@@ -374,34 +592,49 @@ class A2AMetricsAgent(A2AAgent):
 class A2AResearchAgent(A2AAgent):
     """A2A-enabled Research Agent."""
     
+    _SKILLS = (
+        AgentSkill(
+            name="health_research",
+            description="Research health topics with grounding",
+            input_schema={"issue_type": "string", "context": "object"},
+            output_schema={"insights": "array", "sources": "array"}
+        ),
+        AgentSkill(
+            name="safety_check",
+            description="Check for concerning symptoms",
+            input_schema={"symptoms": "string"},
+            output_schema={"needs_professional": "bool", "level": "string"}
+        ),
+    )
+    
     def __init__(self, registry: AgentRegistry):
-        try:
-            from agents.research_agent import ResearchAgent
-            self.research_agent = ResearchAgent()
-        except ImportError:
-            self.research_agent = None
-            logger.warning("ResearchAgent not available - using stub")
+        # ResearchAgent is built on the first message, not at construction
+        self._research_agent = None
+        self._research_loaded = False
+        self._research_lock = threading.Lock()
         super().__init__(registry)
     
+    @property
+    def research_agent(self):
+        """The wrapped ResearchAgent, or None if it cannot be imported."""
+        if not self._research_loaded:
+            with self._research_lock:
+                if not self._research_loaded:
+                    try:
+                        from agents.research_agent import ResearchAgent
+                        self._research_agent = ResearchAgent()
+                    except ImportError:
+                        logger.warning("ResearchAgent not available - using stub")
+                    # Set last so concurrent handlers wait for the build
+                    self._research_loaded = True
+        return self._research_agent
+    
     def _create_card(self) -> AgentCard:
         return AgentCard(
             agent_id="research_agent",
             name="Research Agent",
             description="Provides science-backed health insights with Google Search grounding",
-            skills=[
-                AgentSkill(
-                    name="health_research",
-                    description="Research health topics with grounding",
-                    input_schema={"issue_type": "string", "context": "object"},
-                    output_schema={"insights": "array", "sources": "array"}
-                ),
-                AgentSkill(
-                    name="safety_check",
-                    description="Check for concerning symptoms",
-                    input_schema={"symptoms": "string"},
-                    output_schema={"needs_professional": "bool", "level": "string"}
-                )
-            ],
+            skills=list(self._SKILLS),
             supported_task_types=["health_research", "safety_check"]
         )
     
@@ -450,22 +683,27 @@ class A2AOrchestratorAgent(A2AAgent):
     delegates to other agents based on their capabilities.
     """
     
-    def __init__(self, registry: AgentRegistry):
-        super().__init__(registry)
+    # Fields shared by every coordinated-analysis response
+    _STATIC_RESULT = MappingProxyType({
+        "agents_used": ("metrics_agent", "research_agent"),
+        "coordination_method": "A2A Protocol",
+    })
+    
+    _SKILLS = (
+        AgentSkill(
+            name="full_health_analysis",
+            description="Complete health analysis using all available agents",
+            input_schema={"profile": "object", "checkin": "object"},
+            output_schema={"analysis": "object"}
+        ),
+    )
     
     def _create_card(self) -> AgentCard:
         return AgentCard(
             agent_id="orchestrator_agent",
             name="Orchestrator Agent",
             description="Coordinates health analysis by delegating to specialist agents",
-            skills=[
-                AgentSkill(
-                    name="full_health_analysis",
-                    description="Complete health analysis using all available agents",
-                    input_schema={"profile": "object", "checkin": "object"},
-                    output_schema={"analysis": "object"}
-                )
-            ],
+            skills=list(self._SKILLS),
             supported_task_types=["full_health_analysis", "coordinate"]
         )
     
@@ -488,35 +726,38 @@ class A2AOrchestratorAgent(A2AAgent):
         profile = payload.get("profile", {})
         checkin = payload.get("checkin", {})
         
-        results = {}
-        
-        # Step 1: Delegate to Metrics Agent (via A2A)
-        metrics_response = self.delegate_task("calculate_bmi", {
-            "weight_kg": profile.get("weight_kg"),
-            "height_cm": profile.get("height_cm")
-        })
-        if metrics_response and metrics_response.status == TaskStatus.COMPLETED.value:
-            results["bmi"] = metrics_response.result
-        
-        # Step 2: Get benchmarks (via A2A)
-        benchmark_response = self.delegate_task("get_benchmarks", {
-            "age": profile.get("age"),
-            "sex": profile.get("sex")
-        })
-        if benchmark_response and benchmark_response.status == TaskStatus.COMPLETED.value:
-            results["benchmarks"] = benchmark_response.result
+        # None of the delegations depend on each other, so fan them out and
+        # collect in a fixed order (total latency is the slowest, not the sum)
+        submit = _get_delegation_executor().submit
+        delegations = (
+            # Metrics Agent (via A2A)
+            ("bmi", submit(self.delegate_task, "calculate_bmi", {
+                "weight_kg": profile.get("weight_kg"),
+                "height_cm": profile.get("height_cm")
+            })),
+            # Benchmarks (via A2A)
+            ("benchmarks", submit(self.delegate_task, "get_benchmarks", {
+                "age": profile.get("age"),
+                "sex": profile.get("sex")
+            })),
+            # Research Agent (via A2A)
+            ("research", submit(self.delegate_task, "health_research", {
+                "context": {"profile": profile, "checkin": checkin}
+            })),
+        )
         
-        # Step 3: Delegate to Research Agent (via A2A)
-        research_response = self.delegate_task("health_research", {
-            "context": {"profile": profile, "checkin": checkin}
-        })
-        if research_response and research_response.status == TaskStatus.COMPLETED.value:
-            results["research"] = research_response.result
+        # Failed or missing delegations are left out of the analysis
+        completed = TaskStatus.COMPLETED.value
+        responses = [(key, future.result()) for key, future in delegations]
+        results = {
+            key: response.result
+            for key, response in responses
+            if response and response.status == completed
+        }
         
         return message.create_response({
             "analysis": results,
-            "agents_used": ["metrics_agent", "research_agent"],
-            "coordination_method": "A2A Protocol"
+            **self._STATIC_RESULT,
         }, TaskStatus.COMPLETED)
 
 
@@ -6,11 +6,15 @@ This module provides:
 1. Structured logging with context
 2. Agent execution tracing
 3. Performance metrics collection
+
+Set NIRAVA_TRACE=0 to make @trace_agent a no-op (read once at import).
 """
+import os
+import sys
 import time
 import logging
 import functools
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, Optional, Callable, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
@@ -23,13 +27,22 @@ logging.basicConfig(
 
 logger = logging.getLogger("nirava")
 
+# Tracing switch for decorated agent methods
+_TRACING_ENABLED = os.getenv("NIRAVA_TRACE", "1") != "0"
+
+# dataclass(slots=True) needs Python 3.10+; older interpreters keep __dict__
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
-@dataclass
+@dataclass(**_SLOTS)
 class AgentTrace:
     """Represents a single agent execution trace."""
     agent_name: str
-    start_time: datetime = field(default_factory=datetime.now)
-    end_time: Optional[datetime] = None
+    # Durations come from the monotonic counter; the wall-clock stamp is only
+    # turned into a datetime when start_time/end_time are read.
+    start_ns: int = field(default_factory=time.perf_counter_ns)
+    start_wall_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
     duration_ms: Optional[float] = None
     input_summary: str = ""
     output_summary: str = ""
@@ -37,22 +50,33 @@ class AgentTrace:
     error: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
 
+    @property
+    def start_time(self) -> datetime:
+        return datetime.fromtimestamp(self.start_wall_ns / 1e9)
+
+    @property
+    def end_time(self) -> Optional[datetime]:
+        if self.end_ns is None:
+            return None
+        return datetime.fromtimestamp((self.start_wall_ns + self.end_ns - self.start_ns) / 1e9)
+
     def complete(self, success: bool = True, error: str = None):
         """Mark trace as complete."""
-        self.end_time = datetime.now()
-        self.duration_ms = (self.end_time - self.start_time).total_seconds() * 1000
+        self.end_ns = time.perf_counter_ns()
+        self.duration_ms = (self.end_ns - self.start_ns) / 1e6
         self.success = success
         self.error = error
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class PipelineMetrics:
     """Aggregated metrics for the agent pipeline."""
     total_requests: int = 0
     successful_requests: int = 0
     failed_requests: int = 0
     total_latency_ms: float = 0
-    agent_latencies: Dict[str, list] = field(default_factory=dict)
+    # Running (count, total_ms) per agent; averages need no stored history
+    agent_stats: Dict[str, Tuple[int, float]] = field(default_factory=dict)
     
     @property
     def success_rate(self) -> float:
@@ -76,16 +100,16 @@ class PipelineMetrics:
         
         if trace.duration_ms:
             self.total_latency_ms += trace.duration_ms
-            if trace.agent_name not in self.agent_latencies:
-                self.agent_latencies[trace.agent_name] = []
-            self.agent_latencies[trace.agent_name].append(trace.duration_ms)
+            count, total = self.agent_stats.get(trace.agent_name, (0, 0.0))
+            self.agent_stats[trace.agent_name] = (count + 1, total + trace.duration_ms)
 
     def summary(self) -> Dict[str, Any]:
         """Return metrics summary."""
-        agent_avg = {}
-        for agent, latencies in self.agent_latencies.items():
-            if latencies:
-                agent_avg[agent] = sum(latencies) / len(latencies)
+        agent_avg = {
+            agent: total / count
+            for agent, (count, total) in self.agent_stats.items()
+            if count
+        }
         
         return {
             "total_requests": self.total_requests,
@@ -108,16 +132,16 @@ class Tracer:
             self.trace.input_summary = str(input_data)[:200]
     
     def __enter__(self):
-        logger.info(f"▶ {self.trace.agent_name} started")
+        logger.info("▶ %s started", self.trace.agent_name)
         return self.trace
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         if exc_type:
             self.trace.complete(success=False, error=str(exc_val))
-            logger.error(f"✖ {self.trace.agent_name} failed: {exc_val}")
+            logger.error("✖ %s failed: %s", self.trace.agent_name, exc_val)
         else:
             self.trace.complete(success=True)
-            logger.info(f"✔ {self.trace.agent_name} completed in {self.trace.duration_ms:.0f}ms")
+            logger.info("✔ %s completed in %.0fms", self.trace.agent_name, self.trace.duration_ms)
         
         metrics.record(self.trace)
         return False  # Don't suppress exceptions
@@ -125,6 +149,9 @@ class Tracer:
 
 def trace_agent(func: Callable) -> Callable:
     """Decorator to automatically trace agent methods."""
+    if not _TRACING_ENABLED:
+        return func
+    
     @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
         agent_name = self.__class__.__name__
@@ -135,15 +162,19 @@ def trace_agent(func: Callable) -> Callable:
 
 def log_context(context: Dict[str, Any], stage: str):
     """Log context at a specific pipeline stage."""
-    logger.debug(f"[{stage}] Context keys: {list(context.keys())}")
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    
+    logger.debug("[%s] Context keys: %s", stage, list(context))
     
     # Log key metrics if available
-    if "metrics" in context:
-        m = context["metrics"]
-        logger.debug(f"[{stage}] BMI: {m.get('bmi')}, Sleep OK: {m.get('sleep_ok')}")
+    m = context.get("metrics")
+    if m is not None:
+        logger.debug("[%s] BMI: %s, Sleep OK: %s", stage, m.get('bmi'), m.get('sleep_ok'))
     
-    if "insights" in context:
-        logger.debug(f"[{stage}] Insights count: {len(context['insights'])}")
+    insights = context.get("insights")
+    if insights is not None:
+        logger.debug("[%s] Insights count: %d", stage, len(insights))
 
 
 def get_metrics_summary() -> Dict[str, Any]:
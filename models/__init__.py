@@ -7,17 +7,36 @@ Models:
     DailyCheckIn: Today's health metrics and symptoms.
     ConversationState: Full conversation context and history.
     ConversationPhase: Enum for conversation flow stages.
+    Message: A single chat turn in the conversation history.
 """
-from models.session import (
-    UserProfile,
-    DailyCheckIn,
-    ConversationState,
-    ConversationPhase,
-)
+import importlib
+
+# Names are resolved from their submodule on first access (PEP 562), so
+# importing the package alone does not load models.session.
+_LAZY = {
+    "UserProfile": "models.session",
+    "DailyCheckIn": "models.session",
+    "ConversationState": "models.session",
+    "ConversationPhase": "models.session",
+    "Message": "models.session",
+}
 
 __all__ = [
     "UserProfile",
     "DailyCheckIn",
     "ConversationState",
     "ConversationPhase",
-]
\ No newline at end of file
+    "Message",
+]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,8 +1,12 @@
+import sys
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
+# dataclass(slots=True) needs Python 3.10+; older interpreters keep __dict__
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 class ConversationPhase(Enum):
     INTAKE = "intake"
     POST_ANALYSIS = "post_analysis"
@@ -103,17 +107,44 @@ class DailyCheckIn:
         if self.exercise_minutes is None: missing.append("daily movement/exercise")
         return missing
 
+_MESSAGE_KEYS = ("role", "content")
+
+@dataclass(frozen=True, **_SLOTS)
+class Message:
+    """One chat turn. Slotted to keep long histories small.
+    
+    Supports msg["role"] / msg.get("content") so code written against the
+    old {"role": ..., "content": ...} dicts keeps working.
+    """
+    role: str
+    content: str
+    
+    def __getitem__(self, key: str) -> str:
+        if key in _MESSAGE_KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in _MESSAGE_KEYS else default
+    
+    def to_dict(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> "Message":
+        return cls(role=data.get("role", ""), content=data.get("content", ""))
+
 @dataclass
 class ConversationState:
     """The flowing state of the chat."""
-    history: List[Dict[str, str]] = field(default_factory=list) # [{"role": "user", "content": "..."}]
+    history: List[Message] = field(default_factory=list)
     profile: UserProfile = field(default_factory=UserProfile)
     current_checkin: DailyCheckIn = field(default_factory=DailyCheckIn)
     phase: ConversationPhase = ConversationPhase.INTAKE
     journey_mode: Optional[JourneyMode] = None  # What the user wants from this session
     
     def add_user_message(self, msg: str):
-        self.history.append({"role": "user", "content": msg})
+        self.history.append(Message("user", msg))
         
     def add_agent_message(self, msg: str):
-        self.history.append({"role": "model", "content": msg})
\ No newline at end of file
+        self.history.append(Message("model", msg))
\ No newline at end of file
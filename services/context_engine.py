@@ -9,23 +9,60 @@ This module provides:
 """
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import re
+from itertools import islice
+from typing import Dict, Any, Iterator, List, Literal, Optional, Tuple
 from dataclasses import dataclass, field
 from config.llm import get_gemini_model
-from config.settings import MAX_CONTEXT_TOKENS, MAX_RECENT_MESSAGES
+from config.settings import (
+    COMPACTION_STRATEGY, KEEP_RECENT_TOKENS, MAX_CONTEXT_TOKENS, MAX_RECENT_MESSAGES,
+)
+from config.tokens import CHARS_PER_TOKEN, count_tokens
+from models.session import Message
 
 logger = logging.getLogger(__name__)
 
-# Token limits (approximate, 1 token ≈ 4 chars)
-CHARS_PER_TOKEN = 4
+# Character equivalent of the token limit (approximate, 1 token ≈ 4 chars)
 MAX_CONTEXT_CHARS = MAX_CONTEXT_TOKENS * CHARS_PER_TOKEN
 
+# Check-in fields the LLM distillation copies verbatim (DailyCheckIn pillars)
+_DISTILLED_FIELDS = (
+    "sleep_hours", "water_glasses", "exercise_minutes", "mood_score",
+    "stress_score", "energy_score", "social_hours", "alcohol_units",
+)
+_DISTILL_SCHEMA = "{" + ", ".join(f'"{k}": number|null' for k in _DISTILLED_FIELDS) + "}"
+# Regex heuristic each distilled field supersedes in the extracted facts
+_SUPERSEDED_FACTS = {
+    "sleep_hours": "mentioned_sleep",
+    "stress_score": "mentioned_stress",
+    "mood_score": "mood_indicator",
+}
+
+# Retention weights for the token-budgeted back-scan: a message costs
+# tokens / weight, so higher weights stay verbatim longer. Tool results
+# carry exact data; long model analyses are verbose and evicted first.
+_ROLE_WEIGHTS = {"user": 1.0, "model": 1.0, "tool": 1.5}
+LONG_MESSAGE_TOKENS = 500
+LONG_MODEL_WEIGHT = 0.8
+
+# Fact-extraction patterns (compiled once; mood words match as substrings)
+_SLEEP_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(?:hours?|hrs?)\s*(?:of\s+)?sleep')
+_STRESS_RE = re.compile(r'stress(?:ed)?.*?(\d+)\s*(?:out of|/)\s*10')
+_POSITIVE_MOOD_RE = re.compile(r'happy|great|amazing|good')
+_NEGATIVE_MOOD_RE = re.compile(r'sad|down|depressed|anxious')
+
+# Whole-message pleasantries that carry no health information
+_LOW_SIGNAL_RE = re.compile(
+    r'^\W*(ok(ay)?|thanks?( you)?|thx|got it|hi|hello|hey)\W*$',
+    re.IGNORECASE,
+)
+
 
 @dataclass
 class CompactedContext:
     """Represents a compacted conversation context."""
     summary: str  # Summarized older messages
-    recent_messages: List[Dict[str, str]]  # Last N messages kept verbatim
+    recent_messages: List[Message]  # Last N messages kept verbatim
     extracted_facts: Dict[str, Any]  # Key facts extracted from conversation
     original_length: int  # Original message count
     compacted_length: int  # After compaction
@@ -34,27 +71,99 @@ class CompactedContext:
 class ContextEngine:
     """Manages context window and performs compaction when needed."""
     
-    def __init__(self, max_recent_messages: int = MAX_RECENT_MESSAGES):
+    def __init__(self, max_recent_messages: int = MAX_RECENT_MESSAGES,
+                 strategy: Literal["sliding_window", "summarize"] = COMPACTION_STRATEGY,
+                 keep_recent_tokens: int = KEEP_RECENT_TOKENS):
         self.model = get_gemini_model()
         self.max_recent = max_recent_messages
+        self.keep_recent_tokens = keep_recent_tokens
+        # Only the "summarize" strategy spends an LLM call on older messages
+        self.strategy = strategy
         self.compaction_count = 0
+        # Per-message token counts for the last history seen, so each message
+        # is tokenized once, when it is first checked. The last counted
+        # message is kept to notice the list being rewritten in place.
+        self._tracked_history: Optional[List[Message]] = None
+        self._tracked_last: Optional[Message] = None
+        self._tracked_counts: List[int] = []
+        self._tracked_tokens = 0
+        # Rolling summary of that history's evicted messages ("summarize"
+        # strategy), so each compaction only sends the newly evicted slice
+        self.running_summary = ""
+        self.running_facts: Dict[str, Any] = {}
+        self._summarized_upto = 0
+    
+    def _message_tokens(self, history: List[Message]) -> List[int]:
+        """Token count per message of history, counted incrementally for appends."""
+        counts = self._tracked_counts
+        if (history is not self._tracked_history or len(history) < len(counts)
+                or (counts and history[len(counts) - 1] is not self._tracked_last)):
+            self._tracked_history = history
+            counts = self._tracked_counts = []
+            self._tracked_tokens = 0
+            self.running_summary = ""
+            self.running_facts = {}
+            self._summarized_upto = 0
+        if len(history) > len(counts):
+            new_counts = [count_tokens(m.get("content", "")) for m in islice(history, len(counts), None)]
+            counts.extend(new_counts)
+            self._tracked_tokens += sum(new_counts)
+            self._tracked_last = history[-1]
+        return counts
+    
+    def _history_tokens(self, history: List[Message]) -> int:
+        """Total token count of history."""
+        self._message_tokens(history)
+        return self._tracked_tokens
     
-    def should_compact(self, history: List[Dict[str, str]]) -> bool:
+    def _recent_start(self, history: List[Message]) -> int:
+        """
+        Index of the first message kept verbatim.
+        
+        Walks back from the newest message until either max_recent messages
+        or keep_recent_tokens is reached (the newest message is always kept),
+        then skips a leading model reply whose user turn fell outside the window.
+        Each message is charged its token count divided by its retention weight.
+        """
+        counts = self._message_tokens(history)
+        start = len(history)
+        budget = self.keep_recent_tokens
+        while start > 0 and len(history) - start < self.max_recent:
+            cost = counts[start - 1] / self._retention_weight(history[start - 1], counts[start - 1])
+            if cost > budget and start < len(history):
+                break
+            budget -= cost
+            start -= 1
+        while 0 < start < len(history) - 1 and history[start].get("role") == "model":
+            start += 1
+        return start
+    
+    def should_compact(self, history: List[Message]) -> bool:
         """Check if context needs compaction."""
-        total_chars = sum(len(m.get("content", "")) for m in history)
-        return total_chars > MAX_CONTEXT_CHARS or len(history) > 12
+        return self._history_tokens(history) > MAX_CONTEXT_TOKENS or len(history) > 12
+    
+    @staticmethod
+    def _retention_weight(message: Message, tokens: int) -> float:
+        """Retention weight for a message by role and length (1.0 = neutral)."""
+        role = message.get("role")
+        if role == "model" and tokens > LONG_MESSAGE_TOKENS:
+            return LONG_MODEL_WEIGHT
+        return _ROLE_WEIGHTS.get(role, 1.0)
     
-    def compact(self, history: List[Dict[str, str]], 
+    def compact(self, history: List[Message], 
                 current_facts: Dict[str, Any] = None) -> CompactedContext:
         """
         Compact conversation history while preserving key information.
         
         Strategy:
-        1. Keep last N messages verbatim (most relevant)
-        2. Summarize older messages into a brief context
+        1. Keep the most recent messages verbatim, up to max_recent messages
+           and keep_recent_tokens tokens (most relevant)
+        2. Summarize older messages into a brief context (LLM only when
+           strategy is "summarize"; otherwise rule-based)
         3. Extract key facts for session state
         """
-        if len(history) <= self.max_recent:
+        start = self._recent_start(history)
+        if start == 0:
             # No compaction needed
             return CompactedContext(
                 summary="",
@@ -65,14 +174,22 @@ class ContextEngine:
             )
         
         # Split into older (to summarize) and recent (to keep)
-        older_messages = history[:-self.max_recent]
-        recent_messages = history[-self.max_recent:]
+        older_messages = history[:start]
+        recent_messages = history[start:]
         
         # Summarize older messages
-        summary = self._summarize_messages(older_messages)
+        if self.strategy == "summarize":
+            summary = self._summarize_incremental(history, start)
+        else:
+            summary = self._fallback_summary(older_messages)
         
-        # Extract any new facts from older messages
+        # Extract any new facts from older messages (exact values from the
+        # LLM distillation take precedence over the regex heuristics)
         extracted = self._extract_facts(older_messages, current_facts)
+        if self.strategy == "summarize":
+            for key in self.running_facts:
+                extracted.pop(_SUPERSEDED_FACTS.get(key), None)
+            extracted.update(self.running_facts)
         
         self.compaction_count += 1
         logger.info(f"Context compacted: {len(history)} → {len(recent_messages)} messages (compaction #{self.compaction_count})")
@@ -85,35 +202,105 @@ class ContextEngine:
             compacted_length=len(recent_messages)
         )
     
-    def _summarize_messages(self, messages: List[Dict[str, str]]) -> str:
-        """Summarize a list of messages into a brief context."""
+    def _summarize_incremental(self, history: List[Message], start: int) -> str:
+        """Fold messages evicted since the last compaction into the running summary."""
+        if start < self._summarized_upto:
+            # The verbatim window grew back over summarized messages (e.g. a
+            # long message was evicted), so rebuild the summary for history[:start]
+            self.running_summary = ""
+            self.running_facts = {}
+            self._summarized_upto = 0
+        new_older = history[self._summarized_upto:start]
+        if new_older:
+            if self.running_summary and self.model:
+                summary, facts = self._summarize_messages(new_older, self.running_summary)
+            else:
+                summary, facts = self._summarize_messages(history[:start])
+            self.running_summary = summary
+            self.running_facts.update(facts)
+            self._summarized_upto = start
+        return self.running_summary
+    
+    def _summarize_messages(self, messages: List[Message],
+                            previous_summary: str = "") -> Tuple[str, Dict[str, Any]]:
+        """Distill a list of messages into a brief summary plus exact check-in values.
+        
+        With previous_summary, the messages are treated as new exchanges and
+        merged into it rather than summarized from scratch. Facts are only
+        returned by the LLM path; numbers are copied verbatim, never rounded.
+        """
         if not messages:
-            return ""
+            return previous_summary, {}
         
-        # Try LLM summarization
-        if self.model:
+        # Try LLM distillation (on the pruned transcript)
+        pruned = self._prune_messages(messages) if self.model else messages
+        if self.model and not pruned and previous_summary:
+            return previous_summary, {}
+        if self.model and pruned:
             try:
                 conversation_text = "\n".join([
-                    f"{m['role']}: {m['content']}" for m in messages
+                    f"{m['role']}: {m['content']}" for m in pruned
                 ])
                 
-                prompt = f"""Summarize this health conversation in 2-3 sentences.
-Focus on: What issue was discussed, what data was collected, what advice was given.
+                merge_note = ""
+                if previous_summary:
+                    merge_note = "\nMerge the previous summary with the new exchanges; facts come from the new exchanges only."
+                    source = f"""Previous summary:
+{previous_summary}
 
-Conversation:
-{conversation_text}
+New exchanges:
+{conversation_text}"""
+                else:
+                    source = f"""Conversation:
+{conversation_text}"""
+                
+                prompt = f"""Distill this health conversation. Return ONLY valid JSON:
+{{"summary": "2-3 sentences: what issue was discussed, what data was collected, what advice was given", "facts": {_DISTILL_SCHEMA}}}
+Copy every number exactly as the user stated it; use null for anything not mentioned.{merge_note}
 
-Summary:"""
+{source}"""
                 
                 response = self.model.generate_content(prompt)
-                return response.text.strip()
+                text = response.text.replace("```json", "").replace("```", "").strip()
+                try:
+                    result = json.loads(text)
+                except json.JSONDecodeError:
+                    # Model ignored the format; keep its prose as the summary
+                    return text, {}
+                raw_facts = result.get("facts") or {}
+                facts = {
+                    k: raw_facts[k] for k in _DISTILLED_FIELDS
+                    if isinstance(raw_facts.get(k), (int, float)) and not isinstance(raw_facts.get(k), bool)
+                }
+                return str(result.get("summary", "")).strip(), facts
             except Exception as e:
                 logger.warning(f"LLM summarization failed: {e}")
         
-        # Fallback: simple extraction
-        return self._fallback_summary(messages)
+        # Fallback: keep what we had, or simple extraction
+        return previous_summary or self._fallback_summary(messages), {}
     
-    def _fallback_summary(self, messages: List[Dict[str, str]]) -> str:
+    def _prune_messages(self, messages: List[Message]) -> List[Message]:
+        """
+        Drop low-signal messages before distillation, never rewriting the rest.
+        
+        Removes bare pleasantries ("ok", "thanks", "hi") and repeats of the
+        previous model reply; every surviving message is kept verbatim so
+        exact numbers reach the LLM untouched.
+        """
+        kept = []
+        last_model = None
+        for m in messages:
+            content = m.get("content", "")
+            if _LOW_SIGNAL_RE.match(content):
+                continue
+            if m.get("role") == "model":
+                if content == last_model:
+                    continue
+                last_model = content
+            kept.append(m)
+        return kept
+    
+    def _fallback_summary(self, messages: List[Message]) -> str:
         """Rule-based summary when LLM is unavailable."""
         user_msgs = [m["content"] for m in messages if m["role"] == "user"]
         
@@ -126,7 +313,7 @@ Summary:"""
         
         return f"User initially discussed: '{first_issue}...' ({msg_count} messages exchanged)"
     
-    def _extract_facts(self, messages: List[Dict[str, str]], 
+    def _extract_facts(self, messages: List[Message], 
                        existing_facts: Dict[str, Any] = None) -> Dict[str, Any]:
         """Extract key facts from messages for long-term memory."""
         facts = existing_facts.copy() if existing_facts else {}
@@ -135,40 +322,40 @@ Summary:"""
         all_text = " ".join([m["content"] for m in messages]).lower()
         
         # Extract sleep mentions
-        import re
-        sleep_match = re.search(r'(\d+(?:\.\d+)?)\s*(?:hours?|hrs?)\s*(?:of\s+)?sleep', all_text)
+        sleep_match = _SLEEP_RE.search(all_text)
         if sleep_match:
             facts["mentioned_sleep"] = float(sleep_match.group(1))
         
         # Extract stress mentions
-        stress_match = re.search(r'stress(?:ed)?.*?(\d+)\s*(?:out of|/)\s*10', all_text)
+        stress_match = _STRESS_RE.search(all_text)
         if stress_match:
             facts["mentioned_stress"] = int(stress_match.group(1))
         
         # Extract mood indicators
-        if any(word in all_text for word in ["happy", "great", "amazing", "good"]):
+        if _POSITIVE_MOOD_RE.search(all_text):
             facts["mood_indicator"] = "positive"
-        elif any(word in all_text for word in ["sad", "down", "depressed", "anxious"]):
+        elif _NEGATIVE_MOOD_RE.search(all_text):
             facts["mood_indicator"] = "negative"
         
         return facts
     
     def build_prompt_context(self, compacted: CompactedContext) -> str:
         """Build a prompt-ready context string from compacted context."""
-        parts = []
-        
+        return "\n".join(self._iter_prompt_parts(compacted))
+    
+    @staticmethod
+    def _iter_prompt_parts(compacted: CompactedContext) -> Iterator[str]:
+        """Yield the prompt context lines: summary, facts, then recent messages."""
         if compacted.summary:
-            parts.append(f"[Previous conversation summary: {compacted.summary}]")
+            yield f"[Previous conversation summary: {compacted.summary}]"
         
         if compacted.extracted_facts:
-            facts_str = ", ".join([f"{k}: {v}" for k, v in compacted.extracted_facts.items()])
-            parts.append(f"[Known facts: {facts_str}]")
+            facts_str = ", ".join(f"{k}: {v}" for k, v in compacted.extracted_facts.items())
+            yield f"[Known facts: {facts_str}]"
         
         # Add recent messages
         for msg in compacted.recent_messages:
-            parts.append(f"{msg['role']}: {msg['content']}")
-        
-        return "\n".join(parts)
+            yield f"{msg['role']}: {msg['content']}"
 
 
 # Singleton instance
@@ -9,14 +9,26 @@ This module provides:
 2. Session persistence to JSON (for pause/resume)
 3. Checkpoint creation and restoration
 """
+import atexit
+import glob
 import json
 import logging
 import os
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, field, asdict
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Set, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from config.settings import SESSION_STORAGE_PATH
+from config.settings import MAX_CHECKPOINTS_PER_SESSION, SESSION_STORAGE_PATH
+from models.session import Message
+
+# Optional C-accelerated JSON codec for session files
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +36,60 @@ logger = logging.getLogger(__name__)
 SESSION_DIR = SESSION_STORAGE_PATH
 SESSION_DIR.mkdir(exist_ok=True)
 
+# Reader threads for bulk loads (file reads and orjson decoding release the GIL)
+_LOAD_WORKERS = 8
+
+
+def _json_default(obj):
+    """Stdlib json hook for Message (orjson encodes dataclasses natively)."""
+    if isinstance(obj, Message):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _write_json(path: Path, data: dict):
+    """Write JSON atomically: a crash leaves either the old or the new file."""
+    tmp_path = path.with_suffix(".tmp")
+    if orjson is not None:
+        tmp_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, default=_json_default)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: Path) -> dict:
+    """Read a JSON file written by _write_json."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _dump_line(record: dict) -> bytes:
+    """One JSONL line (UTF-8, newline-terminated)."""
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return (json.dumps(record, ensure_ascii=False, default=_json_default) + "\n").encode("utf-8")
+
+
+def _read_jsonl(path: Path) -> Tuple[List[dict], bool]:
+    """Read a JSONL file, dropping a torn line from an interrupted append.
+    
+    Returns the records and whether every line was intact.
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+    records = []
+    intact = True
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                records.append(loads(line))
+            except ValueError:
+                logger.warning(f"Skipping unreadable line in {path}")
+                intact = False
+    return records, intact
+
 
 @dataclass
 class SessionCheckpoint:
@@ -33,14 +99,47 @@ class SessionCheckpoint:
     phase: str  # INTAKE, ANALYSIS, COMPLETE
     issue_type: Optional[str]
     collected_data: Dict[str, Any]
-    history: List[Dict[str, str]]
+    history: List[Message]
     context_summary: str  # Compacted context
+    session_id: Optional[str] = None  # Owning session (None in older files)
+    # Previous checkpoint whose history prefixes this one; on disk only the
+    # messages after that prefix are stored (see to_record)
+    base_checkpoint_id: Optional[str] = None
     
     def to_dict(self) -> dict:
-        return asdict(self)
+        return {
+            "checkpoint_id": self.checkpoint_id,
+            "created_at": self.created_at,
+            "phase": self.phase,
+            "issue_type": self.issue_type,
+            "collected_data": dict(self.collected_data),
+            "history": [m.to_dict() for m in self.history],
+            "context_summary": self.context_summary,
+            "session_id": self.session_id,
+            "base_checkpoint_id": self.base_checkpoint_id,
+        }
+    
+    def to_record(self, base: Optional["SessionCheckpoint"] = None) -> dict:
+        """On-disk form: history stored as a delta against base when given."""
+        offset = len(base.history) if base is not None else 0
+        return {
+            "checkpoint_id": self.checkpoint_id,
+            "created_at": self.created_at,
+            "phase": self.phase,
+            "issue_type": self.issue_type,
+            "collected_data": self.collected_data,
+            "history": self.history[offset:],
+            "context_summary": self.context_summary,
+            "session_id": self.session_id,
+            "base_checkpoint_id": base.checkpoint_id if base is not None else None,
+            "history_offset": offset,
+        }
     
     @classmethod
     def from_dict(cls, data: dict) -> "SessionCheckpoint":
+        data = dict(data)
+        data.pop("history_offset", None)
+        data["history"] = [Message.from_dict(m) for m in data.get("history", ())]
         return cls(**data)
 
 
@@ -55,15 +154,49 @@ class Session:
     issue_type: Optional[str] = None
     profile: Dict[str, Any] = field(default_factory=dict)
     checkin: Dict[str, Any] = field(default_factory=dict)
-    history: List[Dict[str, str]] = field(default_factory=list)
+    history: List[Message] = field(default_factory=list)
     checkpoints: List[str] = field(default_factory=list)  # List of checkpoint IDs
+    checkpoint_seq: int = 0  # Next checkpoint sequence number; never reused
     metadata: Dict[str, Any] = field(default_factory=dict)
     
     def to_dict(self) -> dict:
-        return asdict(self)
+        return {
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "phase": self.phase,
+            "issue_type": self.issue_type,
+            "profile": dict(self.profile),
+            "checkin": dict(self.checkin),
+            "history": [m.to_dict() for m in self.history],
+            "checkpoints": list(self.checkpoints),
+            "checkpoint_seq": self.checkpoint_seq,
+            "metadata": dict(self.metadata),
+        }
+    
+    def to_header(self) -> dict:
+        """Everything but history, which is persisted as a separate log."""
+        return {
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "phase": self.phase,
+            "issue_type": self.issue_type,
+            "profile": dict(self.profile),
+            "checkin": dict(self.checkin),
+            "checkpoints": list(self.checkpoints),
+            "checkpoint_seq": self.checkpoint_seq,
+            "metadata": dict(self.metadata),
+        }
     
     @classmethod
     def from_dict(cls, data: dict) -> "Session":
+        data = dict(data)
+        # Older files: the checkpoint list had never shrunk, so its length is free
+        data.setdefault("checkpoint_seq", len(data.get("checkpoints", ())))
+        data["history"] = [Message.from_dict(m) for m in data.get("history", ())]
         return cls(**data)
 
 
@@ -80,22 +213,42 @@ class InMemorySessionService:
     def __init__(self, persist: bool = True):
         self._sessions: Dict[str, Session] = {}
         self._checkpoints: Dict[str, SessionCheckpoint] = {}
+        self._cp_to_session: Dict[str, str] = {}  # checkpoint_id -> session_id
+        self._known_sessions: Set[str] = set()  # on disk, parsed on first access
         self._persist = persist
         
-        # Load existing sessions from disk
+        # Session writes go through a single background writer. Only the
+        # latest pending snapshot per session is flushed, so a burst of turns
+        # costs one disk write and the response path never waits on I/O.
+        self._pending: Dict[str, tuple] = {}  # session_id -> (header, history)
+        # History as last written to each session's log, so a turn appends
+        # just its new messages (a missing entry forces a full rewrite).
+        # Only touched on the writer thread.
+        self._logged_history: Dict[str, List[Message]] = {}
+        self._pending_lock = threading.Lock()
+        self._writer: Optional[ThreadPoolExecutor] = None
+        
+        # Index existing sessions on disk
         if persist:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-writer")
+            # Weak, so the exit hook doesn't keep discarded services alive
+            atexit.register(_close_at_exit, weakref.ref(self))
             self._load_from_disk()
     
     # === Core Session Operations ===
     
     def create_session(self, user_id: str, session_id: str = None) -> Session:
         """Create a new session for a user."""
+        now = datetime.now()
         if session_id is None:
-            session_id = f"session_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            session_id = f"session_{user_id}_{now.strftime('%Y%m%d_%H%M%S')}"
         
+        now_iso = now.isoformat()
         session = Session(
             session_id=session_id,
             user_id=user_id,
+            created_at=now_iso,
+            updated_at=now_iso,
             profile={"name": "Friend", "age": 30}  # Defaults
         )
         
@@ -108,12 +261,16 @@ class InMemorySessionService:
         return session
     
     def get_session(self, session_id: str) -> Optional[Session]:
-        """Get a session by ID."""
-        return self._sessions.get(session_id)
+        """Get a session by ID, loading it from disk on first access."""
+        session = self._sessions.get(session_id)
+        if session is None and session_id in self._known_sessions:
+            session = self._load_session(session_id)
+        return session
     
-    def update_session(self, session: Session) -> Session:
-        """Update a session."""
-        session.updated_at = datetime.now().isoformat()
+    def update_session(self, session: Session,
+                       now: Optional[datetime] = None) -> Session:
+        """Update a session (stamped with now, default the current time)."""
+        session.updated_at = (now or datetime.now()).isoformat()
         self._sessions[session.session_id] = session
         
         if self._persist:
@@ -123,19 +280,29 @@ class InMemorySessionService:
     
     def delete_session(self, session_id: str) -> bool:
         """Delete a session and its checkpoints."""
-        if session_id in self._sessions:
-            session = self._sessions.pop(session_id)
+        session = self.get_session(session_id)
+        if session is not None:
+            del self._sessions[session_id]
+            self._known_sessions.discard(session_id)
             
-            # Delete checkpoints
+            # Delete checkpoints; older ones are no longer listed on the
+            # session, so their files are found by id pattern
             for cp_id in session.checkpoints:
                 self._checkpoints.pop(cp_id, None)
+                self._cp_to_session.pop(cp_id, None)
                 if self._persist:
                     cp_path = SESSION_DIR / f"{cp_id}.checkpoint.json"
                     cp_path.unlink(missing_ok=True)
+            if self._persist:
+                for cp_path in _checkpoint_files(session_id):
+                    cp_path.unlink(missing_ok=True)
             
             if self._persist:
-                session_path = SESSION_DIR / f"{session_id}.json"
-                session_path.unlink(missing_ok=True)
+                # Drop any unwritten snapshot and unlink on the writer thread,
+                # after any in-flight write of this session
+                with self._pending_lock:
+                    self._pending.pop(session_id, None)
+                self._submit(self._delete_session_files, session_id)
             
             logger.info(f"Deleted session: {session_id}")
             return True
@@ -143,6 +310,9 @@ class InMemorySessionService:
     
     def list_sessions(self, user_id: str = None) -> List[Session]:
         """List all sessions, optionally filtered by user."""
+        unloaded = [sid for sid in self._known_sessions if sid not in self._sessions]
+        if unloaded:
+            self._load_sessions(unloaded)
         sessions = list(self._sessions.values())
         if user_id:
             sessions = [s for s in sessions if s.user_id == user_id]
@@ -162,24 +332,41 @@ class InMemorySessionService:
             logger.error(f"Cannot checkpoint: session {session_id} not found")
             return None
         
-        checkpoint_id = f"cp_{session_id}_{datetime.now().strftime('%H%M%S')}"
+        # Sequence number within the session: persisted with it and never
+        # reused, even if checkpoints are later removed from the list
+        now = datetime.now()
+        seq = session.checkpoint_seq
+        session.checkpoint_seq += 1
+        checkpoint_id = f"cp_{session_id}_{seq:08d}"
         
+        # Messages are never mutated in place, so checkpoints share the
+        # message objects with the session and with each other. Every
+        # MAX_CHECKPOINTS_PER_SESSION-th checkpoint is stored in full, which
+        # bounds delta chains and what one lost file can take with it.
+        base = None
+        if seq % MAX_CHECKPOINTS_PER_SESSION:
+            base = self._delta_base(session, session.history)
         checkpoint = SessionCheckpoint(
             checkpoint_id=checkpoint_id,
-            created_at=datetime.now().isoformat(),
+            created_at=now.isoformat(),
             phase=session.phase,
             issue_type=session.issue_type,
             collected_data=session.checkin.copy(),
             history=session.history.copy(),
-            context_summary=context_summary
+            context_summary=context_summary,
+            session_id=session_id,
+            base_checkpoint_id=base.checkpoint_id if base is not None else None,
         )
         
         self._checkpoints[checkpoint_id] = checkpoint
+        self._cp_to_session[checkpoint_id] = session_id
         session.checkpoints.append(checkpoint_id)
-        self.update_session(session)
+        if self._persist:
+            self._evict_checkpoints(session)
+        self.update_session(session, now=now)
         
         if self._persist:
-            self._save_checkpoint(checkpoint)
+            self._save_checkpoint(checkpoint, base)
         
         logger.info(f"Created checkpoint: {checkpoint_id} for session {session_id}")
         return checkpoint
@@ -190,33 +377,59 @@ class InMemorySessionService:
         
         Returns the session restored to the checkpoint state.
         """
-        checkpoint = self._checkpoints.get(checkpoint_id)
+        checkpoint = self._get_checkpoint(checkpoint_id)
         if not checkpoint:
-            # Try loading from disk
-            if self._persist:
-                checkpoint = self._load_checkpoint(checkpoint_id)
-            
-            if not checkpoint:
-                logger.error(f"Checkpoint {checkpoint_id} not found")
-                return None
+            logger.error(f"Checkpoint {checkpoint_id} not found")
+            return None
         
         # Find the parent session
-        session_id = checkpoint_id.split("_")[1] + "_" + checkpoint_id.split("_")[2]
-        for sid, session in self._sessions.items():
-            if checkpoint_id in session.checkpoints:
-                # Restore session state from checkpoint
-                session.phase = checkpoint.phase
-                session.issue_type = checkpoint.issue_type
-                session.checkin = checkpoint.collected_data.copy()
-                session.history = checkpoint.history.copy()
-                
-                self.update_session(session)
-                logger.info(f"Resumed session {session.session_id} from checkpoint {checkpoint_id}")
-                return session
+        session_id = self._cp_to_session.get(checkpoint_id) or checkpoint.session_id
+        session = self.get_session(session_id) if session_id else None
+        if session is None:
+            # Checkpoints saved before session_id was recorded
+            session = next(
+                (s for s in self.list_sessions() if checkpoint_id in s.checkpoints),
+                None,
+            )
+        if session is not None:
+            # Restore session state from checkpoint
+            session.phase = checkpoint.phase
+            session.issue_type = checkpoint.issue_type
+            session.checkin = checkpoint.collected_data.copy()
+            session.history = checkpoint.history.copy()
+            
+            self.update_session(session)
+            logger.info(f"Resumed session {session.session_id} from checkpoint {checkpoint_id}")
+            return session
         
         logger.error(f"Could not find session for checkpoint {checkpoint_id}")
         return None
     
+    def _evict_checkpoints(self, session: Session):
+        """Keep only the session's newest checkpoints listed and cached.
+        
+        Evicted checkpoints stay on disk and can still be resumed by id.
+        """
+        overflow = len(session.checkpoints) - MAX_CHECKPOINTS_PER_SESSION
+        if overflow > 0:
+            for cp_id in session.checkpoints[:overflow]:
+                self._checkpoints.pop(cp_id, None)
+                self._cp_to_session.pop(cp_id, None)
+            del session.checkpoints[:overflow]
+    
+    def _delta_base(self, session: Session,
+                    history: List[Message]) -> Optional[SessionCheckpoint]:
+        """Latest checkpoint of session whose history is a prefix of history."""
+        if not session.checkpoints:
+            return None
+        base = self._get_checkpoint(session.checkpoints[-1])
+        if base is None or len(base.history) > len(history):
+            return None
+        for old, new in zip(base.history, history):
+            if old is not new and old != new:
+                return None
+        return base
+    
     def get_latest_checkpoint(self, session_id: str) -> Optional[SessionCheckpoint]:
         """Get the most recent checkpoint for a session."""
         session = self.get_session(session_id)
@@ -224,60 +437,233 @@ class InMemorySessionService:
             return None
         
         latest_id = session.checkpoints[-1]
-        return self._checkpoints.get(latest_id)
+        return self._get_checkpoint(latest_id)
+    
+    def _get_checkpoint(self, checkpoint_id: str) -> Optional[SessionCheckpoint]:
+        """Get a checkpoint by ID, loading it from disk on first access."""
+        checkpoint = self._checkpoints.get(checkpoint_id)
+        if checkpoint is None and self._persist:
+            checkpoint = self._load_checkpoint(checkpoint_id)
+            if checkpoint is not None and self._is_recent_checkpoint(checkpoint):
+                self._checkpoints[checkpoint_id] = checkpoint
+        return checkpoint
+    
+    def _is_recent_checkpoint(self, checkpoint: SessionCheckpoint) -> bool:
+        """Whether checkpoint is still listed (memory-resident) on its session."""
+        cp_id = checkpoint.checkpoint_id
+        session = self.get_session(self._cp_to_session.get(cp_id) or checkpoint.session_id)
+        if session is None:
+            return True
+        return cp_id in session.checkpoints
     
     # === Persistence ===
     
     def _save_session(self, session: Session):
-        """Save session to disk."""
-        path = SESSION_DIR / f"{session.session_id}.json"
-        with open(path, "w") as f:
-            json.dump(session.to_dict(), f, indent=2)
+        """Queue a snapshot of the session for the background writer."""
+        # Snapshot on the caller's thread so later mutations can't race the write
+        data = (session.to_header(), list(session.history))
+        with self._pending_lock:
+            queued = session.session_id in self._pending
+            self._pending[session.session_id] = data
+        if not queued:
+            self._submit(self._flush_session, session.session_id)
+    
+    def _submit(self, fn, *args):
+        """Run fn on the writer thread, or inline once the service is closed."""
+        if self._writer is not None:
+            self._writer.submit(fn, *args)
+        else:
+            fn(*args)
+    
+    def _flush_session(self, session_id: str):
+        """Write the latest pending snapshot of a session (writer thread)."""
+        with self._pending_lock:
+            data = self._pending.pop(session_id, None)
+        if data is None:
+            return
+        header, history = data
+        try:
+            self._write_history(session_id, history)
+            _write_json(SESSION_DIR / f"{session_id}.json", header)
+        except Exception as e:
+            logger.error(f"Failed to save session {session_id}: {e}")
+    
+    def _write_history(self, session_id: str, history: List[Message]):
+        """Append new messages to the session's history log (writer thread).
+        
+        The log is only rewritten when history no longer extends what was
+        logged, e.g. after resuming from a checkpoint.
+        """
+        path = SESSION_DIR / f"{session_id}.history.jsonl"
+        logged = self._logged_history.get(session_id)
+        if logged is not None and len(logged) <= len(history) and all(
+            old is new or old == new for old, new in zip(logged, history)
+        ):
+            if len(history) > len(logged):
+                with open(path, "ab") as f:
+                    f.write(b"".join(map(_dump_line, history[len(logged):])))
+        else:
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(b"".join(map(_dump_line, history)))
+            os.replace(tmp_path, path)
+        self._logged_history[session_id] = history
+    
+    def _seed_logged_history(self, session_id: str, history: List[Message]):
+        """Record the log contents read at load time (writer thread).
+        
+        A write already run for this session wins: it knows what it logged.
+        """
+        self._logged_history.setdefault(session_id, history)
+    
+    def _delete_session_files(self, session_id: str):
+        """Remove a session's header and history log (writer thread)."""
+        self._logged_history.pop(session_id, None)
+        (SESSION_DIR / f"{session_id}.json").unlink(missing_ok=True)
+        (SESSION_DIR / f"{session_id}.history.jsonl").unlink(missing_ok=True)
+    
+    def flush(self):
+        """Block until all queued session writes have reached disk."""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
     
-    def _save_checkpoint(self, checkpoint: SessionCheckpoint):
-        """Save checkpoint to disk."""
+    def close(self):
+        """Write any queued sessions and stop the writer thread.
+        
+        Later saves are written synchronously.
+        """
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.shutdown(wait=True)  # Runs every queued write first
+    
+    def _save_checkpoint(self, checkpoint: SessionCheckpoint,
+                         base: Optional[SessionCheckpoint] = None):
+        """Save checkpoint to disk (history as a delta against base)."""
         path = SESSION_DIR / f"{checkpoint.checkpoint_id}.checkpoint.json"
-        with open(path, "w") as f:
-            json.dump(checkpoint.to_dict(), f, indent=2)
+        _write_json(path, checkpoint.to_record(base))
     
     def _load_from_disk(self):
-        """Load all sessions and checkpoints from disk."""
-        # Load sessions
-        for path in SESSION_DIR.glob("*.json"):
-            if ".checkpoint." in path.name:
-                continue
-            try:
-                with open(path) as f:
-                    data = json.load(f)
-                    session = Session.from_dict(data)
-                    self._sessions[session.session_id] = session
-            except Exception as e:
-                logger.warning(f"Failed to load session {path}: {e}")
-        
-        # Load checkpoints
-        for path in SESSION_DIR.glob("*.checkpoint.json"):
-            try:
-                with open(path) as f:
-                    data = json.load(f)
-                    cp = SessionCheckpoint.from_dict(data)
-                    self._checkpoints[cp.checkpoint_id] = cp
-            except Exception as e:
-                logger.warning(f"Failed to load checkpoint {path}: {e}")
+        """Index sessions on disk; each file is parsed on first access."""
+        self._known_sessions = {
+            p.stem for p in SESSION_DIR.glob("*.json") if ".checkpoint." not in p.name
+        }
+        logger.info(f"Found {len(self._known_sessions)} sessions on disk")
+    
+    def _load_session(self, session_id: str) -> Optional[Session]:
+        """Load a specific session from disk and cache it."""
+        return self._cache_session(session_id, self._read_session(session_id))
+    
+    def _load_sessions(self, session_ids: List[str]):
+        """Load many sessions, reading and decoding the files concurrently."""
+        if len(session_ids) == 1:
+            self._load_session(session_ids[0])
+            return
+        workers = min(_LOAD_WORKERS, len(session_ids))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="session-loader") as pool:
+            for session_id, loaded in zip(session_ids, pool.map(self._read_session, session_ids)):
+                self._cache_session(session_id, loaded)
+    
+    @staticmethod
+    def _read_session(session_id: str) -> Optional[Tuple[Session, bool]]:
+        """Read a session from disk (thread-safe; touches no service state).
         
-        logger.info(f"Loaded {len(self._sessions)} sessions, {len(self._checkpoints)} checkpoints")
+        Returns the session and whether its history came from an intact log.
+        """
+        path = SESSION_DIR / f"{session_id}.json"
+        log_path = SESSION_DIR / f"{session_id}.history.jsonl"
+        try:
+            data = _read_json(path)
+            logged = False
+            if "history" not in data and log_path.exists():  # else a pre-log file
+                data["history"], logged = _read_jsonl(log_path)
+            return Session.from_dict(data), logged
+        except Exception as e:
+            logger.warning(f"Failed to load session {path}: {e}")
+            return None
+    
+    def _cache_session(self, session_id: str,
+                       loaded: Optional[Tuple[Session, bool]]) -> Optional[Session]:
+        """Register a session read by _read_session."""
+        if loaded is None:
+            self._known_sessions.discard(session_id)
+            return None
+        session, logged = loaded
+        if logged:
+            self._submit(self._seed_logged_history, session_id, list(session.history))
+        self._sessions[session_id] = session
+        for cp_id in session.checkpoints:
+            self._cp_to_session[cp_id] = session_id
+        return session
     
     def _load_checkpoint(self, checkpoint_id: str) -> Optional[SessionCheckpoint]:
-        """Load a specific checkpoint from disk."""
+        """Load a checkpoint from disk, rebuilding history from its delta chain.
+        
+        The chain is walked back to a full checkpoint (or one already in
+        memory), then resolved forwards.
+        """
+        chain: List[Tuple[SessionCheckpoint, int]] = []
+        seen: Set[str] = set()
+        base_history: List[Message] = []
+        cp_id = checkpoint_id
+        while cp_id is not None:
+            cached = self._checkpoints.get(cp_id) if chain else None
+            if cached is not None:
+                base_history = cached.history
+                break
+            if cp_id in seen:
+                logger.error(f"Checkpoint {checkpoint_id}: base chain loops at {cp_id}")
+                return None
+            seen.add(cp_id)
+            loaded = self._read_checkpoint(cp_id)
+            if loaded is None:
+                if chain:
+                    logger.warning(f"Checkpoint {checkpoint_id}: base {cp_id} missing")
+                return None
+            chain.append(loaded)
+            cp_id = loaded[0].base_checkpoint_id
+        
+        for checkpoint, offset in reversed(chain):
+            if len(base_history) < offset:
+                logger.warning(f"Checkpoint {checkpoint_id}: base of {checkpoint.checkpoint_id} too short")
+                return None
+            checkpoint.history = base_history[:offset] + checkpoint.history
+            base_history = checkpoint.history
+            if checkpoint.checkpoint_id != checkpoint_id and self._is_recent_checkpoint(checkpoint):
+                self._checkpoints[checkpoint.checkpoint_id] = checkpoint
+        return chain[0][0]
+    
+    @staticmethod
+    def _read_checkpoint(checkpoint_id: str) -> Optional[Tuple[SessionCheckpoint, int]]:
+        """Read one checkpoint file as stored: its history delta and offset."""
         path = SESSION_DIR / f"{checkpoint_id}.checkpoint.json"
         if path.exists():
             try:
-                with open(path) as f:
-                    return SessionCheckpoint.from_dict(json.load(f))
+                data = _read_json(path)
+                return SessionCheckpoint.from_dict(data), data.get("history_offset", 0)
             except Exception as e:
                 logger.error(f"Failed to load checkpoint: {e}")
         return None
 
 
+def _checkpoint_files(session_id: str) -> List[Path]:
+    """Checkpoint files on disk written for session_id, listed or not.
+    
+    Matches both cp_<session>_<seq> ids and the older cp_<session>_<HHMMSS>.
+    """
+    prefix, suffix = f"cp_{session_id}_", ".checkpoint.json"
+    return [
+        p for p in SESSION_DIR.glob(f"{glob.escape(prefix)}*{suffix}")
+        # Skip checkpoints of sessions whose id merely starts with session_id
+        if p.name[len(prefix):-len(suffix)].isdigit()
+    ]
+
+
+def _close_at_exit(service_ref: "weakref.ref[InMemorySessionService]"):
+    """atexit hook: close a service if it is still alive."""
+    service = service_ref()
+    if service is not None:
+        service.close()
+
+
 # Global session service instance
 _session_service = None
 
@@ -0,0 +1,169 @@
+"""Tests for the A2A protocol value types, registry and agents.
+
+All agents run in fallback mode (no API calls).
+"""
+import copy
+import dataclasses
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.a2a_protocol import (
+    A2AMessage,
+    A2AResearchAgent,
+    AgentCard,
+    AgentRegistry,
+    AgentSkill,
+    TaskStatus,
+    create_a2a_system,
+)
+
+
+def _skill(**overrides):
+    fields = {
+        "name": "calculate_bmi",
+        "description": "Calculate Body Mass Index",
+        "input_schema": {"weight_kg": "float", "height_cm": "float"},
+        "output_schema": {"bmi": "float"},
+    }
+    fields.update(overrides)
+    return AgentSkill(**fields)
+
+
+class TestAgentSkill:
+    """AgentSkill is an immutable, hashable value object."""
+
+    def test_equal_skills_hash_equally(self):
+        assert _skill() == _skill()
+        assert hash(_skill()) == hash(_skill())
+        assert len({_skill(), _skill(), _skill(name="calculate_bmr")}) == 2
+
+    def test_schemas_round_trip_as_dicts(self):
+        data = _skill().to_dict()
+        assert data["input_schema"] == {"weight_kg": "float", "height_cm": "float"}
+        assert AgentSkill(**data) == _skill()
+
+    def test_copy_and_pickle(self):
+        skill = _skill()
+        assert copy.deepcopy(skill) == skill
+        assert pickle.loads(pickle.dumps(skill)) == skill
+        assert dataclasses.asdict(skill)["name"] == "calculate_bmi"
+
+        card = AgentCard(agent_id="a", name="A", description="", skills=[skill])
+        assert copy.deepcopy(card).has_skill("calculate_bmi")
+        assert dataclasses.asdict(card)["skills"][0]["name"] == "calculate_bmi"
+
+
+class TestA2AMessage:
+    """Serialized messages never alias the message's own state."""
+
+    def test_to_dict_mutation_does_not_leak(self):
+        message = A2AMessage(task_type="calculate_bmi", payload={"weight_kg": 70})
+        data = message.to_dict()
+        data["task_type"] = "changed"
+        data["payload"]["weight_kg"] = 0
+
+        assert message.payload == {"weight_kg": 70}
+        assert message.to_dict()["task_type"] == "calculate_bmi"
+        assert message.to_dict()["payload"] == {"weight_kg": 70}
+
+    def test_json_round_trip(self):
+        message = A2AMessage(task_type="calculate_bmi", payload={"weight_kg": 70})
+        # Timestamps travel at microsecond precision
+        assert A2AMessage.from_json(message.to_json()).to_dict() == message.to_dict()
+
+    def test_json_reflects_later_mutation(self):
+        message = A2AMessage(task_type="calculate_bmi")
+        message.to_json()
+        message.status = "completed"
+        assert A2AMessage.from_json(message.to_json()).status == "completed"
+
+
+PROFILE = {"age": 30, "sex": "male", "weight_kg": 70, "height_cm": 175}
+CHECKIN = {"sleep_hours": 6, "stress_score": 7}
+
+
+class TestOrchestrator:
+    """Concurrent fan-out gives the same analysis as delegating in turn."""
+
+    def test_coordinated_matches_sequential(self):
+        registry, orchestrator = create_a2a_system()
+        response = registry.route_message(A2AMessage(
+            sender_id="test",
+            recipient_id="orchestrator_agent",
+            task_type="full_health_analysis",
+            payload={"profile": PROFILE, "checkin": CHECKIN},
+        ))
+
+        sequential = {}
+        for key, skill, payload in (
+            ("bmi", "calculate_bmi", {"weight_kg": 70, "height_cm": 175}),
+            ("benchmarks", "get_benchmarks", {"age": 30, "sex": "male"}),
+            ("research", "health_research", {"context": {"profile": PROFILE, "checkin": CHECKIN}}),
+        ):
+            delegated = orchestrator.delegate_task(skill, payload)
+            if delegated and delegated.status == TaskStatus.COMPLETED.value:
+                sequential[key] = delegated.result
+
+        assert response.status == TaskStatus.COMPLETED.value
+        assert response.result["analysis"] == sequential
+        assert list(response.result["analysis"]) == list(sequential)
+
+    def test_research_agent_built_once_under_concurrency(self, monkeypatch):
+        import agents.research_agent
+
+        built = []
+
+        class SlowResearchAgent:
+            def __init__(self):
+                time.sleep(0.05)
+                built.append(self)
+
+        monkeypatch.setattr(agents.research_agent, "ResearchAgent", SlowResearchAgent)
+        agent = A2AResearchAgent(AgentRegistry())
+        start = threading.Barrier(4)
+
+        def get():
+            start.wait()
+            return agent.research_agent
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            seen = list(pool.map(lambda _: get(), range(4)))
+
+        assert len(built) == 1
+        assert all(a is built[0] for a in seen)
+
+
+class TestMetricsAgent:
+    """A2AMetricsAgent handles untrusted payloads like the plain tools do."""
+
+    def _ask(self, task_type, payload):
+        registry, _ = create_a2a_system()
+        return registry.route_message(A2AMessage(
+            sender_id="test", recipient_id="metrics_agent", task_type=task_type, payload=payload,
+        ))
+
+    def test_bmr_matches_tool(self):
+        from tools.health_metrics import calc_bmr_mifflin
+
+        response = self._ask("calculate_bmr", {"weight_kg": 70, "height_cm": 175, "age": 30, "sex": "male"})
+        assert response.status == TaskStatus.COMPLETED.value
+        assert response.result == {"bmr": calc_bmr_mifflin(70, 175, 30, "male")}
+
+    def test_bmr_unhashable_payload_value(self):
+        response = self._ask("calculate_bmr", {"weight_kg": [70], "height_cm": 175, "age": 30, "sex": "male"})
+        assert response.status == TaskStatus.COMPLETED.value
+        assert response.result == {"bmr": None}
+
+    def test_benchmarks_are_read_only(self):
+        response = self._ask("get_benchmarks", {"age": 30, "sex": "male"})
+        with pytest.raises(TypeError):
+            response.result["benchmarks"]["water"]["glasses"] = 0
+
+    def test_benchmarks_travel_as_json(self):
+        response = self._ask("get_benchmarks", {"age": 30, "sex": "male"})
+        decoded = A2AMessage.from_json(response.to_json())
+        assert decoded.result["benchmarks"]["water"]["glasses"] == 15
@@ -6,12 +6,14 @@ without requiring API calls (using fallback modes).
 Run with: pytest tests/ -v
 """
 import pytest
+from config.settings import GOOGLE_API_KEY
 from models.session import ConversationState, UserProfile, DailyCheckIn, ConversationPhase
 from tools.health_metrics import (
     calc_bmi,
     bmi_category,
     calc_bmr_mifflin,
     calc_sleep_recommendation_hours,
+    estimate_vo2_max,
     get_ideal_benchmarks,
     build_standard_health_snapshot
 )
@@ -57,6 +59,23 @@ class TestHealthMetricsTools:
         assert teen[0] > adult[0]  # Teens need more sleep
         assert adult == (7.0, 9.0)  # Standard adult range
 
+    def test_vo2_max_without_resting_hr(self):
+        """Without a resting HR, VO2 max uses the age/sex/activity estimate."""
+        assert estimate_vo2_max(30, "male", 150) == 47.5
+        assert estimate_vo2_max(30, "female", 0) == 33.5
+        assert estimate_vo2_max(None, "male", 150) is None
+
+    def test_vo2_max_with_resting_hr(self):
+        """A measured resting HR switches to the Uth-Sørensen ratio."""
+        assert estimate_vo2_max(30, "male", 150, resting_hr=60) == 48.5  # 15.33 * 190 / 60
+        assert estimate_vo2_max(30, "female", 0, resting_hr=60) == 48.5  # sex/activity not used
+        assert estimate_vo2_max(20, "male", 0, resting_hr=30) == 80  # Clamped
+
+    def test_vo2_max_ignores_implausible_resting_hr(self):
+        """Resting HR outside 30-120 bpm falls back to the estimate."""
+        assert estimate_vo2_max(30, "male", 150, resting_hr=10) == 47.5
+        assert estimate_vo2_max(30, "male", 150, resting_hr=200) == 47.5
+
 
 class TestIdealBenchmarks:
     """Test the clinical benchmark generation (Day 3: Prompt Engineering)."""
@@ -86,6 +105,15 @@ class TestIdealBenchmarks:
         
         assert male["water"]["liters"] > female["water"]["liters"]
 
+    def test_benchmarks_are_read_only(self):
+        """The shared cached result cannot be edited by a caller."""
+        benchmarks = get_ideal_benchmarks(30, "male")
+        with pytest.raises(TypeError):
+            benchmarks["water"]["glasses"] = 0
+        with pytest.raises(TypeError):
+            del benchmarks["sleep"]
+        assert get_ideal_benchmarks(30, "male")["water"]["glasses"] == 15
+
 
 class TestSessionModels:
     """Test the conversation state management (Day 1: Foundational Models)."""
@@ -207,13 +235,14 @@ class TestSafetyKeywords:
         assert "depression" in SAFETY_KEYWORDS["recommend_doctor"]
 
 
-# Integration test (requires API key, skipped by default)
-@pytest.mark.skip(reason="Requires GOOGLE_API_KEY - run manually")
+# Integration test (requires API key and the Gemini SDK, skipped otherwise)
+@pytest.mark.skipif(not GOOGLE_API_KEY, reason="Requires GOOGLE_API_KEY")
 class TestIntegration:
     """Integration tests that require a live API connection."""
 
     def test_full_pipeline(self):
         """Test the complete agent pipeline."""
+        pytest.importorskip("google.generativeai")
         from adk_main import NiravaSystem
         
         system = NiravaSystem()
@@ -0,0 +1,131 @@
+"""Tests for context compaction (windowing and rolling summaries).
+
+A fake model stands in for Gemini so the summarize strategy runs offline.
+"""
+import json
+import re
+
+import pytest
+
+from models.session import Message
+from services.context_engine import ContextEngine
+
+_LINE_RE = re.compile(r"^(?:user|model): (.*)$", re.MULTILINE)
+_PREVIOUS_RE = re.compile(r"Previous summary:\n(.*)\n")
+
+
+class FakeModel:
+    """Summarizes by listing message contents, merged after any previous summary."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        seen = _LINE_RE.findall(prompt)
+        previous = _PREVIOUS_RE.search(prompt)
+        if previous:
+            seen = previous.group(1).split("|") + seen
+        text = json.dumps({"summary": "|".join(seen), "facts": {}})
+        return type("Response", (), {"text": text})()
+
+
+def _history(n):
+    return [Message("user" if i % 2 == 0 else "model", f"m{i}") for i in range(n)]
+
+
+@pytest.fixture
+def engine():
+    engine = ContextEngine(max_recent_messages=4, strategy="summarize", keep_recent_tokens=10_000)
+    engine.model = FakeModel()
+    return engine
+
+
+class TestRecentWindow:
+    """Which messages stay verbatim."""
+
+    def test_short_history_is_not_compacted(self):
+        engine = ContextEngine(max_recent_messages=4)
+        history = _history(3)
+        compacted = engine.compact(history)
+        assert compacted.summary == ""
+        assert compacted.recent_messages == history
+
+    def test_keeps_max_recent_messages(self):
+        engine = ContextEngine(max_recent_messages=4)
+        history = _history(10)
+        compacted = engine.compact(history)
+        assert compacted.recent_messages == history[6:]
+        assert compacted.summary
+
+    def test_token_budget_limits_window(self):
+        engine = ContextEngine(max_recent_messages=6, keep_recent_tokens=5)
+        history = _history(8)
+        history[-2] = Message("model", "word " * 200)
+        assert engine.compact(history).recent_messages == history[-1:]
+
+    def test_window_does_not_start_with_orphan_model_reply(self):
+        engine = ContextEngine(max_recent_messages=3)
+        history = _history(10)
+        assert engine.compact(history).recent_messages[0]["role"] == "user"
+
+
+class TestRunningSummary:
+    """The summarize strategy folds only newly evicted messages into its summary."""
+
+    def test_only_new_slice_is_sent(self, engine):
+        history = _history(10)
+        engine.compact(history)
+        assert engine.running_summary == "m0|m1|m2|m3|m4|m5"
+
+        history += _history(12)[10:]
+        engine.compact(history)
+        assert engine.running_summary == "m0|m1|m2|m3|m4|m5|m6|m7"
+        assert _LINE_RE.findall(engine.model.prompts[-1]) == ["m6", "m7"]
+
+    def test_window_growing_back_resummarizes(self, engine):
+        history = _history(10)
+        engine.compact(history)
+        assert engine._summarized_upto == 6
+
+        # A larger window now keeps m4 and m5 verbatim again
+        engine.max_recent = 6
+        compacted = engine.compact(history)
+        assert compacted.recent_messages == history[4:]
+        assert engine.running_summary == "m0|m1|m2|m3"
+        assert engine._summarized_upto == 4
+
+        # Later evictions continue from the rebuilt summary without gaps
+        history += _history(12)[10:]
+        engine.compact(history)
+        assert engine.running_summary == "m0|m1|m2|m3|m4|m5"
+
+    def test_new_history_resets_summary(self, engine):
+        engine.compact(_history(10))
+        other = [Message(m.role, "x" + m.content) for m in _history(10)]
+        engine.compact(other)
+        assert engine.running_summary == "xm0|xm1|xm2|xm3|xm4|xm5"
+
+    def test_history_rewritten_in_place_resets_summary(self, engine):
+        history = _history(10)
+        engine.compact(history)
+        history[:] = [Message(m.role, "x" + m.content) for m in _history(10)]
+        engine.compact(history)
+        assert engine.running_summary == "xm0|xm1|xm2|xm3|xm4|xm5"
+
+
+class TestExtractedFacts:
+    """Exact distilled values replace the matching regex heuristics."""
+
+    def test_distilled_facts_take_precedence(self, engine):
+        def distill(prompt):
+            text = json.dumps({"summary": "s", "facts": {"sleep_hours": 6.5}})
+            return type("Response", (), {"text": text})()
+
+        engine.model.generate_content = distill
+        history = _history(10)
+        history[0] = Message("user", "I got 5 hours of sleep, stress at 8/10")
+        facts = engine.compact(history).extracted_facts
+        assert facts["sleep_hours"] == 6.5
+        assert "mentioned_sleep" not in facts
+        assert facts["mentioned_stress"] == 8
@@ -0,0 +1,382 @@
+"""Tests for session persistence (pause/resume and on-disk formats).
+
+Each test gets its own session directory, so nothing touches
+SESSION_STORAGE_PATH.
+"""
+import json
+import threading
+
+import pytest
+
+from models.session import Message
+from services import session_service
+from services.session_service import InMemorySessionService, Session, SessionCheckpoint
+
+
+@pytest.fixture
+def session_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_service, "SESSION_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def make_service(session_dir):
+    """Build services over session_dir; each is closed at teardown."""
+    services = []
+
+    def make():
+        svc = InMemorySessionService(persist=True)
+        services.append(svc)
+        return svc
+
+    yield make
+    for svc in services:
+        svc.close()
+
+
+@pytest.fixture
+def service(make_service):
+    return make_service()
+
+
+class TestMessage:
+    """Message keeps the old dict-style access working."""
+
+    def test_item_access(self):
+        msg = Message("user", "hi")
+        assert msg["role"] == "user"
+        assert msg["content"] == "hi"
+        with pytest.raises(KeyError):
+            msg["tokens"]
+
+    def test_get(self):
+        msg = Message("model", "hello")
+        assert msg.get("content") == "hello"
+        assert msg.get("tokens") is None
+        assert msg.get("tokens", 0) == 0
+
+    def test_dict_round_trip(self):
+        msg = Message("user", "hi")
+        assert msg.to_dict() == {"role": "user", "content": "hi"}
+        assert Message.from_dict(msg.to_dict()) == msg
+        assert Message.from_dict({}) == Message("", "")
+
+
+class TestSessionDicts:
+    """to_dict stays plain JSON-serializable data."""
+
+    def test_session_to_dict_is_json_serializable(self):
+        session = Session(session_id="x", user_id="u", history=[Message("user", "hi")])
+        data = json.loads(json.dumps(session.to_dict()))
+        assert data["history"] == [{"role": "user", "content": "hi"}]
+        assert Session.from_dict(data).history == session.history
+
+    def test_checkpoint_to_dict_is_json_serializable(self):
+        checkpoint = SessionCheckpoint(
+            checkpoint_id="cp", created_at="now", phase="INTAKE", issue_type=None,
+            collected_data={}, history=[Message("user", "hi")], context_summary="",
+        )
+        data = json.loads(json.dumps(checkpoint.to_dict()))
+        assert data["history"] == [{"role": "user", "content": "hi"}]
+        assert SessionCheckpoint.from_dict(data).history == checkpoint.history
+
+
+class TestLegacyFiles:
+    """Files written before the history log and delta checkpoints still load."""
+
+    def test_load_inline_history_session(self, session_dir, make_service):
+        legacy = Session(session_id="old", user_id="u").to_dict()
+        legacy["history"] = [{"role": "user", "content": "hi"}, {"role": "model", "content": "hello"}]
+        (session_dir / "old.json").write_text(json.dumps(legacy))
+
+        session = make_service().get_session("old")
+        assert session.history == [Message("user", "hi"), Message("model", "hello")]
+        assert session.history[0]["content"] == "hi"
+
+    def test_load_full_format_checkpoint(self, session_dir, make_service):
+        session = Session(session_id="old", user_id="u", checkpoints=["cp_old"]).to_dict()
+        session["history"] = []
+        (session_dir / "old.json").write_text(json.dumps(session))
+        checkpoint = {
+            "checkpoint_id": "cp_old", "created_at": "2024-01-01T00:00:00",
+            "phase": "INTAKE", "issue_type": None, "collected_data": {"sleep_hours": 7},
+            "history": [{"role": "user", "content": "hi"}], "context_summary": "",
+        }
+        (session_dir / "cp_old.checkpoint.json").write_text(json.dumps(checkpoint))
+
+        resumed = make_service().resume_from_checkpoint("cp_old")
+        assert resumed.session_id == "old"
+        assert resumed.history == [Message("user", "hi")]
+        assert resumed.checkin == {"sleep_hours": 7}
+
+
+class TestBackgroundWriter:
+    """Session saves are coalesced on a single writer thread."""
+
+    def test_burst_of_saves_is_one_write(self, service, session_dir, monkeypatch):
+        writes = []
+        real_write_json = session_service._write_json
+
+        def counting_write_json(path, data):
+            writes.append(path.name)
+            real_write_json(path, data)
+
+        monkeypatch.setattr(session_service, "_write_json", counting_write_json)
+        session = service.create_session("u", session_id="s1")
+        service.flush()
+        writes.clear()
+
+        # Hold the writer so every save below queues behind it
+        release = threading.Event()
+        service._writer.submit(release.wait)
+        for turn in range(5):
+            session.history.append(Message("user", f"turn {turn}"))
+            service.update_session(session)
+        release.set()
+        service.flush()
+
+        assert writes == ["s1.json"]
+
+    def test_flush_makes_data_durable(self, service, session_dir, make_service):
+        session = service.create_session("u", session_id="s1")
+        session.phase = "ANALYSIS"
+        session.history.append(Message("user", "hi"))
+        service.update_session(session)
+        service.flush()
+
+        reloaded = make_service().get_session("s1")
+        assert reloaded.phase == "ANALYSIS"
+        assert reloaded.history == [Message("user", "hi")]
+
+    def test_close_writes_queued_sessions(self, session_dir, make_service):
+        service = make_service()
+        service.create_session("u", session_id="s1")
+        service.close()
+        assert (session_dir / "s1.json").exists()
+
+        # Saves after close are written synchronously
+        session = service.get_session("s1")
+        session.phase = "ANALYSIS"
+        service.update_session(session)
+        assert make_service().get_session("s1").phase == "ANALYSIS"
+
+
+def _checkpoint_turns(service, session_id, turns):
+    session = service.get_session(session_id) or service.create_session("u", session_id=session_id)
+    ids = []
+    for turn in range(turns):
+        session.history.append(Message("user", str(turn)))
+        service.update_session(session)
+        ids.append(service.create_checkpoint(session_id).checkpoint_id)
+    return ids
+
+
+class TestCheckpointDeltas:
+    """Checkpoint files store history as a delta against the previous one."""
+
+    def test_delta_round_trip(self, service, session_dir, make_service):
+        ids = _checkpoint_turns(service, "s1", 3)
+        service.flush()
+
+        stored = json.loads((session_dir / f"{ids[2]}.checkpoint.json").read_text())
+        assert stored["base_checkpoint_id"] == ids[1]
+        assert stored["history_offset"] == 2
+        assert stored["history"] == [{"role": "user", "content": "2"}]
+
+        resumed = make_service().resume_from_checkpoint(ids[2])
+        assert [m["content"] for m in resumed.history] == ["0", "1", "2"]
+
+    def test_full_checkpoint_every_max(self, service, session_dir, make_service, monkeypatch):
+        monkeypatch.setattr(session_service, "MAX_CHECKPOINTS_PER_SESSION", 3)
+        ids = _checkpoint_turns(service, "s1", 7)
+        service.flush()
+
+        bases = [service._get_checkpoint(cp_id).base_checkpoint_id for cp_id in ids]
+        assert bases == [None, ids[0], ids[1], None, ids[3], ids[4], None]
+
+        # A lost file only breaks the deltas that depend on it
+        (session_dir / f"{ids[1]}.checkpoint.json").unlink()
+        fresh = make_service()
+        assert fresh.resume_from_checkpoint(ids[2]) is None
+        resumed = fresh.resume_from_checkpoint(ids[5])
+        assert [m["content"] for m in resumed.history] == ["0", "1", "2", "3", "4", "5"]
+
+    def test_long_chain_resolves_without_recursion(self, session_dir, make_service):
+        # A chain longer than the recursion limit, as older files could form
+        session = Session(session_id="s1", user_id="u")
+        previous = None
+        for turn in range(1500):
+            session.history.append(Message("user", str(turn)))
+            checkpoint = SessionCheckpoint(
+                checkpoint_id=f"cp_s1_{turn}", created_at="now", phase="INTAKE", issue_type=None,
+                collected_data={}, history=list(session.history), context_summary="",
+            )
+            (session_dir / f"cp_s1_{turn}.checkpoint.json").write_text(
+                json.dumps(checkpoint.to_record(previous), default=Message.to_dict)
+            )
+            session.checkpoints.append(checkpoint.checkpoint_id)
+            previous = checkpoint
+        header = session.to_dict()
+        (session_dir / "s1.json").write_text(json.dumps(header))
+
+        resumed = make_service().resume_from_checkpoint("cp_s1_1499")
+        assert len(resumed.history) == 1500
+        assert resumed.history[-1] == Message("user", "1499")
+
+
+class TestCheckpointCap:
+    """Only a session's newest checkpoints stay listed and in memory."""
+
+    def test_list_and_caches_are_capped(self, service, monkeypatch):
+        monkeypatch.setattr(session_service, "MAX_CHECKPOINTS_PER_SESSION", 3)
+        ids = _checkpoint_turns(service, "s1", 7)
+
+        assert service.get_session("s1").checkpoints == ids[-3:]
+        assert set(service._checkpoints) == set(ids[-3:])
+        assert set(service._cp_to_session) == set(ids[-3:])
+
+        # Evicted checkpoints resume from disk without being cached again
+        resumed = service.resume_from_checkpoint(ids[1])
+        assert [m["content"] for m in resumed.history] == ["0", "1"]
+        assert ids[1] not in service._checkpoints
+
+    def test_delete_removes_unlisted_checkpoint_files(self, service, session_dir, monkeypatch):
+        monkeypatch.setattr(session_service, "MAX_CHECKPOINTS_PER_SESSION", 3)
+        _checkpoint_turns(service, "s1", 5)
+        other = _checkpoint_turns(service, "s1_b", 1)
+        (session_dir / "cp_s1_120000.checkpoint.json").write_text("{}")  # older id format
+        service.flush()
+
+        service.delete_session("s1")
+        service.flush()
+        assert sorted(p.name for p in session_dir.glob("cp_*")) == [f"{other[0]}.checkpoint.json"]
+
+    def test_checkpoint_and_session_share_timestamp(self, service):
+        session = service.create_session("u", session_id="s1")
+        checkpoint = service.create_checkpoint("s1")
+        assert checkpoint.created_at == session.updated_at
+
+
+class TestCheckpointIds:
+    """Checkpoint ids come from a per-session counter that never goes back."""
+
+    def test_ids_not_reused_after_removal(self, service, session_dir):
+        session = service.create_session("u", session_id="s1")
+        first = service.create_checkpoint("s1")
+        second = service.create_checkpoint("s1")
+        session.checkpoints.remove(second.checkpoint_id)
+
+        third = service.create_checkpoint("s1")
+        assert third.checkpoint_id not in (first.checkpoint_id, second.checkpoint_id)
+        assert session.checkpoint_seq == 3
+
+    def test_counter_survives_reload(self, service, make_service):
+        service.create_session("u", session_id="s1")
+        service.create_checkpoint("s1")
+        service.close()
+
+        reloaded = make_service()
+        assert reloaded.get_session("s1").checkpoint_seq == 1
+        assert reloaded.create_checkpoint("s1").checkpoint_id == "cp_s1_00000001"
+
+    def test_older_header_starts_after_existing_checkpoints(self):
+        data = Session(session_id="s1", user_id="u", checkpoints=["a", "b"]).to_dict()
+        del data["checkpoint_seq"]
+        assert Session.from_dict(data).checkpoint_seq == 2
+
+
+def _log_lines(session_dir, session_id):
+    path = session_dir / f"{session_id}.history.jsonl"
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class TestHistoryLog:
+    """History is kept in an append-only log next to the session header."""
+
+    def test_round_trip(self, service, session_dir, make_service):
+        session = service.create_session("u", session_id="s1")
+        session.history += [Message("user", "hi"), Message("model", "héllo")]
+        service.update_session(session)
+        service.flush()
+
+        assert "history" not in json.loads((session_dir / "s1.json").read_text())
+        assert _log_lines(session_dir, "s1") == [
+            {"role": "user", "content": "hi"}, {"role": "model", "content": "héllo"},
+        ]
+        assert make_service().get_session("s1").history == session.history
+
+    def test_more_turns_append(self, service, session_dir, make_service):
+        session = service.create_session("u", session_id="s1")
+        session.history.append(Message("user", "one"))
+        service.update_session(session)
+        service.flush()
+        log_path = session_dir / "s1.history.jsonl"
+        inode = log_path.stat().st_ino
+
+        session.history += [Message("model", "two"), Message("user", "three")]
+        service.update_session(session)
+        service.flush()
+
+        assert log_path.stat().st_ino == inode  # Appended, not rewritten
+        assert [m["content"] for m in _log_lines(session_dir, "s1")] == ["one", "two", "three"]
+
+    def test_append_after_reload(self, service, session_dir, make_service):
+        session = service.create_session("u", session_id="s1")
+        session.history.append(Message("user", "one"))
+        service.update_session(session)
+        service.close()
+
+        reloaded_service = make_service()
+        session = reloaded_service.get_session("s1")
+        session.history.append(Message("model", "two"))
+        reloaded_service.update_session(session)
+        reloaded_service.flush()
+
+        assert [m["content"] for m in _log_lines(session_dir, "s1")] == ["one", "two"]
+
+    def test_resume_rewrites_log(self, service, session_dir):
+        session = service.create_session("u", session_id="s1")
+        session.history.append(Message("user", "one"))
+        checkpoint = service.create_checkpoint("s1")
+        session.history += [Message("model", "two"), Message("user", "three")]
+        service.update_session(session)
+        service.flush()
+        inode = (session_dir / "s1.history.jsonl").stat().st_ino
+
+        service.resume_from_checkpoint(checkpoint.checkpoint_id)
+        service.flush()
+
+        assert (session_dir / "s1.history.jsonl").stat().st_ino != inode
+        assert [m["content"] for m in _log_lines(session_dir, "s1")] == ["one"]
+
+    def test_torn_last_line_is_rewritten(self, service, session_dir, make_service):
+        session = service.create_session("u", session_id="s1")
+        session.history.append(Message("user", "one"))
+        service.update_session(session)
+        service.close()
+        with open(session_dir / "s1.history.jsonl", "ab") as f:
+            f.write(b'{"role": "model", "cont')
+
+        reloaded_service = make_service()
+        session = reloaded_service.get_session("s1")
+        assert session.history == [Message("user", "one")]
+        session.history.append(Message("model", "two"))
+        reloaded_service.update_session(session)
+        reloaded_service.flush()
+
+        assert [m["content"] for m in _log_lines(session_dir, "s1")] == ["one", "two"]
+
+    def test_migrates_inline_history_file(self, session_dir, make_service):
+        legacy = Session(session_id="old", user_id="u").to_dict()
+        legacy["history"] = [{"role": "user", "content": "hi"}]
+        (session_dir / "old.json").write_text(json.dumps(legacy))
+
+        service = make_service()
+        session = service.get_session("old")
+        session.history.append(Message("model", "hello"))
+        service.update_session(session)
+        service.flush()
+
+        assert "history" not in json.loads((session_dir / "old.json").read_text())
+        assert [m["content"] for m in _log_lines(session_dir, "old")] == ["hi", "hello"]
+        assert make_service().get_session("old").history == session.history
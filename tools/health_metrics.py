@@ -1,4 +1,77 @@
-from typing import Dict, Optional, Tuple
+from bisect import bisect_right
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+
+# Lookup tables, built once at import
+# Activity multipliers applied to BMR (estimate_tdee)
+_TDEE_FACTORS = MappingProxyType({
+    "sedentary": 1.2,
+    "light": 1.375,
+    "moderate": 1.55,
+    "active": 1.725,
+    "very_active": 1.9,
+})
+
+# Water target adjustments in ml (small, because we don't want extremes)
+_ACTIVITY_BONUS_ML = MappingProxyType({
+    "sedentary": 0,
+    "light": 200,
+    "moderate": 400,
+    "active": 600,
+    "very_active": 800,
+})
+_CLIMATE_BONUS_ML = MappingProxyType({
+    "cold": -200,
+    "temperate": 0,
+    "hot": 300,
+})
+
+# Mifflin-St Jeor sex constant; unknown sex uses the average (5 - 161) / 2
+_BMR_SEX_OFFSET = MappingProxyType({"male": 5, "female": -161})
+
+# WHO adult BMI categories: <18.5, 18.5-24.9, 25-29.9, 30+
+_BMI_BREAKS = (18.5, 25.0, 30.0)
+_BMI_LABELS = ("underweight", "normal", "overweight", "obese")
+
+# Age bands for get_ideal_benchmarks: <14, 14-17, 18-25, 26-64, 65+.
+# Index a per-band tuple with bisect_right(_AGE_BREAKS, age).
+_AGE_BREAKS = (14, 18, 26, 65)
+# Sleep (National Sleep Foundation)
+_SLEEP_HOURS = ("9-11", "8-10", "7-9", "7-9", "7-8")
+_SLEEP_NOTES = (
+    "Growing bodies need more recovery time",
+    "Teens need extra sleep for brain development",
+    "Young adults benefit from consistent 7-9h",
+    "Adults function best with 7-9h",
+    "Seniors may need slightly less but quality matters",
+)
+# Exercise (WHO/AHA): children <18, adults 18-64, seniors 65+
+_CHILD_EXERCISE = ("60 min/day (420 min/week)", "Children need daily active play", 60)
+_ADULT_EXERCISE = ("150-300 min/week moderate OR 75-150 min vigorous", "Plus 2 days strength training", 22)
+_SENIOR_EXERCISE = ("150 min/week moderate + balance exercises", "Focus on mobility and fall prevention", 22)
+_EXERCISE = (_CHILD_EXERCISE, _CHILD_EXERCISE, _ADULT_EXERCISE, _ADULT_EXERCISE, _SENIOR_EXERCISE)
+
+# Plausible measured resting heart rates (bpm) for the Uth-Sørensen VO2 max
+# estimate; endurance athletes reach the low 30s, >120 is tachycardia
+_RESTING_HR_MIN, _RESTING_HR_MAX = 30, 120
+
+# Hydration score by share of target glasses: <40%, 40-59%, 60-79%, 80-89%, 90%+
+_HYDRATION_BREAKS = (0.4, 0.6, 0.8, 0.9)
+_HYDRATION_SCORES = (2, 4, 6, 8, 10)
+
+# Risk levels for the "low" / "moderate" / "high" indicators, kept as
+# ordered ints while adjusting so a bump is one step up the scale
+_RISK_LEVELS = ("low", "moderate", "high")
+_LOW, _MODERATE, _HIGH = range(3)
+
+# MET values by exercise type (calc_met_score)
+_MET_VALUES = MappingProxyType({
+    "cardio": 6.0,
+    "strength": 4.5,
+    "both": 5.5,  # Average
+    "none": 0.0,
+})
 
 
 def calc_bmi(weight_kg: float, height_cm: float) -> Optional[float]:
@@ -26,11 +99,11 @@ def calc_bmi(weight_kg: float, height_cm: float) -> Optional[float]:
     # Range validation
     if weight_kg <= 0 or weight_kg > 500:
         return None
-    if height_cm <= 0 or height_cm > 300 or height_cm < 50:
+    if height_cm < 50 or height_cm > 300:
         return None
     
     height_m = height_cm / 100.0
-    return round(weight_kg / (height_m ** 2), 1)
+    return round(weight_kg / (height_m * height_m), 1)
 
 
 def bmi_category(bmi: Optional[float]) -> Optional[str]:
@@ -39,13 +112,7 @@ def bmi_category(bmi: Optional[float]) -> Optional[str]:
     """
     if bmi is None:
         return None
-    if bmi < 18.5:
-        return "underweight"
-    if bmi < 25:
-        return "normal"
-    if bmi < 30:
-        return "overweight"
-    return "obese"
+    return _BMI_LABELS[bisect_right(_BMI_BREAKS, bmi)]
 
 
 def calc_bmr_mifflin(
@@ -84,15 +151,8 @@ def calc_bmr_mifflin(
         return None
 
     sex = (sex or "").lower()
-    if sex == "male":
-        bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age_years + 5
-    elif sex == "female":
-        bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age_years - 161
-    else:
-        # Unknown sex: fall back to sex-neutral-ish average
-        bmr_male = 10 * weight_kg + 6.25 * height_cm - 5 * age_years + 5
-        bmr_female = 10 * weight_kg + 6.25 * height_cm - 5 * age_years - 161
-        bmr = (bmr_male + bmr_female) / 2
+    # Unknown sex: fall back to sex-neutral-ish average of the two offsets
+    bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age_years + _BMR_SEX_OFFSET.get(sex, -78)
 
     return round(max(800, bmr), 0)  # BMR minimum 800 kcal (survival mode)
 
@@ -121,14 +181,7 @@ def estimate_tdee(bmr: Optional[float], activity_level: str) -> Optional[float]:
         return None
 
     activity_level = (activity_level or "").lower()
-    factors = {
-        "sedentary": 1.2,
-        "light": 1.375,
-        "moderate": 1.55,
-        "active": 1.725,
-        "very_active": 1.9,
-    }
-    factor = factors.get(activity_level, 1.375)  # default to 'light'
+    factor = _TDEE_FACTORS.get(activity_level, 1.375)  # default to 'light'
     return round(bmr * factor, 0)
 
 
@@ -150,21 +203,11 @@ def calc_daily_water_target_ml(
     activity_level = (activity_level or "").lower()
     climate = (climate or "").lower()
 
-    # Activity adjustment (small, because we don't want extremes)
-    activity_bonus = {
-        "sedentary": 0,
-        "light": 200,
-        "moderate": 400,
-        "active": 600,
-        "very_active": 800,
-    }.get(activity_level, 200)
+    # Activity adjustment
+    activity_bonus = _ACTIVITY_BONUS_ML.get(activity_level, 200)
 
     # Climate adjustment
-    climate_bonus = {
-        "cold": -200,
-        "temperate": 0,
-        "hot": 300,
-    }.get(climate, 0)
+    climate_bonus = _CLIMATE_BONUS_ML.get(climate, 0)
 
     target_ml = weight_kg * base_per_kg + activity_bonus + climate_bonus
     return int(round(target_ml, -1))  # round to nearest 10 ml
@@ -187,31 +230,29 @@ def calc_sleep_recommendation_hours(age_years: int) -> Optional[Tuple[float, flo
     return 7.0, 8.0
 
 
-def get_ideal_benchmarks(age: int, sex: str) -> Dict[str, any]:
+def get_ideal_benchmarks(age: int, sex: str) -> Mapping[str, Any]:
     """
     Return comprehensive clinical reference ranges based on age and sex.
     Sources: WHO, CDC, National Sleep Foundation, American Heart Association.
+
+    The result and its sections are read-only views of a cached entry;
+    copy with dict() before modifying.
     """
     # Safe defaults for None values
     age = age or 30  # Default to adult if age not provided
     sex = (sex or "unknown").lower()
-    
+    # The cached entry is shared, so it is handed out read-only
+    return _benchmarks_for(age, sex)
+
+
+@lru_cache(maxsize=256)
+def _benchmarks_for(age: int, sex: str) -> Mapping[str, Any]:
+    """Build the benchmarks for a normalized (age, sex); see get_ideal_benchmarks."""
+    band = bisect_right(_AGE_BREAKS, age)
+
     # === SLEEP (National Sleep Foundation) ===
-    if age < 14:
-        sleep_hours = "9-11"
-        sleep_note = "Growing bodies need more recovery time"
-    elif age < 18:
-        sleep_hours = "8-10"
-        sleep_note = "Teens need extra sleep for brain development"
-    elif age < 26:
-        sleep_hours = "7-9"
-        sleep_note = "Young adults benefit from consistent 7-9h"
-    elif age < 65:
-        sleep_hours = "7-9"
-        sleep_note = "Adults function best with 7-9h"
-    else:
-        sleep_hours = "7-8"
-        sleep_note = "Seniors may need slightly less but quality matters"
+    sleep_hours = _SLEEP_HOURS[band]
+    sleep_note = _SLEEP_NOTES[band]
 
     # === WATER (Institute of Medicine) ===
     if sex == "male":
@@ -236,15 +277,7 @@ def get_ideal_benchmarks(age: int, sex: str) -> Dict[str, any]:
         bmi_note = "Normal range for disease prevention"
 
     # === EXERCISE (WHO/AHA) ===
-    if age < 18:
-        exercise_weekly = "60 min/day (420 min/week)"
-        exercise_note = "Children need daily active play"
-    elif age < 65:
-        exercise_weekly = "150-300 min/week moderate OR 75-150 min vigorous"
-        exercise_note = "Plus 2 days strength training"
-    else:
-        exercise_weekly = "150 min/week moderate + balance exercises"
-        exercise_note = "Focus on mobility and fall prevention"
+    exercise_weekly, exercise_note, exercise_daily_min = _EXERCISE[band]
 
     # === RESTING HEART RATE (AHA) ===
     # Generally 60-100 bpm, but fitter = lower
@@ -257,7 +290,7 @@ def get_ideal_benchmarks(age: int, sex: str) -> Dict[str, any]:
     stress_target = "Below 4/10 daily average"
     stress_note = "Chronic stress >6/10 impacts sleep, immunity, and recovery"
 
-    return {
+    benchmarks = {
         "sleep": {
             "hours": sleep_hours,
             "note": sleep_note
@@ -273,7 +306,7 @@ def get_ideal_benchmarks(age: int, sex: str) -> Dict[str, any]:
         },
         "exercise": {
             "weekly": exercise_weekly,
-            "daily_min": 22 if age >= 18 else 60,  # 150/7 ≈ 22 min/day
+            "daily_min": exercise_daily_min,  # adults: 150/7 ≈ 22 min/day
             "note": exercise_note
         },
         "resting_heart_rate": rhr_range,
@@ -283,6 +316,10 @@ def get_ideal_benchmarks(age: int, sex: str) -> Dict[str, any]:
         },
         "summary": f"Benchmarks for {age}y old {sex}"
     }
+    return MappingProxyType({
+        key: MappingProxyType(value) if isinstance(value, dict) else value
+        for key, value in benchmarks.items()
+    })
 
 def build_standard_health_snapshot(
     profile: Dict,
@@ -308,15 +345,63 @@ def build_standard_health_snapshot(
 
     Returns a dict with metrics + simple OK flags.
     """
-    age = profile.get("age")
-    sex = profile.get("sex")
-    height_cm = profile.get("height_cm")
-    weight_kg = profile.get("weight_kg")
-    activity_level = profile.get("activity_level", "light")
+    p_get = profile.get
+    c_get = checkin.get
+    inputs = (
+        p_get("age"),
+        p_get("sex"),
+        p_get("height_cm"),
+        p_get("weight_kg"),
+        p_get("activity_level", "light"),
+        c_get("sleep_hours"),
+        c_get("water_glasses"),
+    )
+    try:
+        hash(inputs)
+    except TypeError:  # e.g. a list slipped into the profile; skip the cache
+        values = _snapshot_values.__wrapped__(*inputs)
+    else:
+        values = _snapshot_values(*inputs)
+    return values.as_dict()
+
+
+class HealthSnapshot(NamedTuple):
+    """Computed snapshot metrics (compact form kept in the snapshot cache)."""
+    bmi: Optional[float]
+    bmi_category: Optional[str]
+    bmr: Optional[float]
+    tdee: Optional[float]
+    daily_water_target_ml: Optional[int]
+    sleep_recommendation_hours: Optional[Tuple[float, float]]
+    hydration_ok: Optional[bool]
+    sleep_ok: Optional[bool]
+
+    def as_dict(self) -> Dict:
+        """The dict form returned by build_standard_health_snapshot."""
+        sleep_rec = self.sleep_recommendation_hours
+        return {
+            "bmi": self.bmi,
+            "bmi_category": self.bmi_category,
+            "bmr": self.bmr,
+            "tdee": self.tdee,
+            "daily_water_target_ml": self.daily_water_target_ml,
+            "sleep_recommendation_hours": {
+                "min": sleep_rec[0],
+                "max": sleep_rec[1],
+            }
+            if sleep_rec is not None
+            else None,
+            "hydration_ok": self.hydration_ok,
+            "sleep_ok": self.sleep_ok,
+        }
 
-    sleep_hours = checkin.get("sleep_hours")
-    water_glasses = checkin.get("water_glasses")
 
+# The same profile and check-in are snapshotted several times per turn.
+# Cached as a HealthSnapshot; callers get a fresh dict since they add keys to it.
+@lru_cache(maxsize=256, typed=True)
+def _snapshot_values(age, sex, height_cm, weight_kg, activity_level,
+                     sleep_hours, water_glasses) -> HealthSnapshot:
+    """Compute the snapshot metrics; see build_standard_health_snapshot."""
     bmi = calc_bmi(weight_kg, height_cm)
     bmi_cat = bmi_category(bmi)
     bmr = calc_bmr_mifflin(weight_kg, height_cm, age, sex)
@@ -336,23 +421,12 @@ def build_standard_health_snapshot(
         min_h, max_h = sleep_rec
         sleep_ok = min_h <= sleep_hours <= max_h
 
-    snapshot = {
-        "bmi": bmi,
-        "bmi_category": bmi_cat,
-        "bmr": bmr,
-        "tdee": tdee,
-        "daily_water_target_ml": water_target_ml,
-        "sleep_recommendation_hours": {
-            "min": sleep_rec[0],
-            "max": sleep_rec[1],
-        }
-        if sleep_rec is not None
-        else None,
-        "hydration_ok": hydration_ok,
-        "sleep_ok": sleep_ok,
-    }
+    return HealthSnapshot(bmi, bmi_cat, bmr, tdee, water_target_ml, sleep_rec, hydration_ok, sleep_ok)
+
 
-    return snapshot
+def _clamp_1_10(score):
+    """Clamp a pillar score to the 1-10 scale."""
+    return 1 if score < 1 else (10 if score > 10 else score)
 
 
 # ============================================================================
@@ -435,7 +509,7 @@ def calc_sleep_quality_score(sleep_hours: float, stress_score: int, alcohol_unit
     if alcohol_units and alcohol_units > 0:
         score -= min(alcohol_units, 3)  # Each drink worsens REM sleep
     
-    return max(1, min(10, score))  # Clamp to 1-10
+    return _clamp_1_10(score)
 
 
 # ============================================================================
@@ -489,17 +563,7 @@ def calc_hydration_score(water_glasses: int, target_glasses: int, urine_frequenc
         return None
     
     ratio = water_glasses / target_glasses
-    
-    if ratio >= 0.9:
-        score = 10
-    elif ratio >= 0.8:
-        score = 8
-    elif ratio >= 0.6:
-        score = 6
-    elif ratio >= 0.4:
-        score = 4
-    else:
-        score = 2
+    score = _HYDRATION_SCORES[bisect_right(_HYDRATION_BREAKS, ratio)]
     
     # Adjust for urine frequency if available
     if urine_frequency is not None:
@@ -533,16 +597,10 @@ def calc_met_score(exercise_minutes: int, exercise_type: str) -> Optional[float]
     if not exercise_minutes or exercise_minutes <= 0:
         return 0.0
     
-    exercise_type = (exercise_type or "").lower()
-    
-    met_values = {
-        "cardio": 6.0,
-        "strength": 4.5,
-        "both": 5.5,  # Average
-        "none": 0.0,
-    }
-    
-    met = met_values.get(exercise_type, 3.5)  # Default to light activity
+    # Intake stores exercise_type lowercased, so only lowercase on a miss
+    met = _MET_VALUES.get(exercise_type)
+    if met is None:
+        met = _MET_VALUES.get((exercise_type or "").lower(), 3.5)  # Default to light activity
     return round(exercise_minutes * met, 1)
 
 
@@ -550,8 +608,11 @@ def estimate_vo2_max(age: int, sex: str, exercise_minutes_weekly: float, resting
     """
     Estimated VO2 Max (Cardiorespiratory Fitness)
     
-    Simplified non-exercise prediction equation
-    Based on: age, sex, physical activity, resting heart rate
+    With a measured resting heart rate, uses the Uth-Sørensen heart-rate
+    ratio: VO2 max = 15.33 × HRmax / HRrest, where HRmax = 220 - age.
+    Without one (or with an implausible reading outside 30-120 bpm), falls
+    back to a simplified non-exercise prediction based on age, sex and
+    physical activity.
     
     VO2 Max Interpretation (ml/kg/min):
     - Men 20-29: <42 (poor), 42-46 (fair), 46-51 (good), 51-56 (excellent), >56 (superior)
@@ -559,28 +620,26 @@ def estimate_vo2_max(age: int, sex: str, exercise_minutes_weekly: float, resting
     
     Note: This is a rough estimate. Lab VO2 max testing is the gold standard.
     
-    Source: Journal of Applied Physiology, Non-Exercise VO2 Max Prediction
+    Source: Uth et al., Eur J Appl Physiol (2004); Journal of Applied Physiology,
+    Non-Exercise VO2 Max Prediction
     """
     if not age or not sex:
         return None
     
-    sex = sex.lower()
-    exercise_minutes_weekly = exercise_minutes_weekly or 0
-    resting_hr = resting_hr or 70  # Default resting HR
-    
-    # Base VO2 max by age and sex
-    if sex == "male":
-        base_vo2 = 60 - (0.6 * age)
+    if resting_hr and _RESTING_HR_MIN <= resting_hr <= _RESTING_HR_MAX:
+        vo2_max = 15.33 * (220 - age) / resting_hr
     else:
-        base_vo2 = 48 - (0.5 * age)
-    
-    # Adjust for physical activity (150 min/week = baseline)
-    activity_factor = (exercise_minutes_weekly / 150) * 5
-    
-    # Adjust for resting heart rate (lower is better)
-    hr_adjustment = (75 - resting_hr) * 0.1
-    
-    vo2_max = base_vo2 + activity_factor + hr_adjustment
+        # Base VO2 max by age and sex
+        if sex.lower() == "male":
+            base_vo2 = 60 - (0.6 * age)
+        else:
+            base_vo2 = 48 - (0.5 * age)
+        
+        # Adjust for physical activity (150 min/week = baseline)
+        activity_factor = ((exercise_minutes_weekly or 0) / 150) * 5
+        
+        # Default resting HR of 70 adds (75 - 70) * 0.1
+        vo2_max = base_vo2 + activity_factor + 0.5
     
     return round(max(20, min(80, vo2_max)), 1)  # Clamp to realistic range
 
@@ -641,7 +700,7 @@ def calc_sedentary_risk_score(exercise_minutes_daily: int, sitting_hours: Option
     elif sitting_hours <= 5:
         risk_score -= 1
     
-    return max(1, min(10, risk_score))
+    return _clamp_1_10(risk_score)
 
 
 # ============================================================================
@@ -683,7 +742,7 @@ def calc_stress_load_index(stress_score: int, sleep_hours: float, social_hours:
         elif social_hours < 0.5:
             load += 1  # Isolation worsens stress
     
-    return max(1, min(10, load))
+    return _clamp_1_10(load)
 
 
 def calc_burnout_risk_score(stress_score: int, energy_score: int, mood_score: int, sleep_hours: float) -> Optional[int]:
@@ -728,7 +787,7 @@ def calc_burnout_risk_score(stress_score: int, energy_score: int, mood_score: in
     if sleep_hours is not None and sleep_hours < 6:
         risk += 1
     
-    return max(1, min(10, risk))
+    return _clamp_1_10(risk)
 
 
 def calc_mental_resilience_score(stress_score: int, mood_score: int, social_hours: float, exercise_minutes: int) -> Optional[int]:
@@ -777,7 +836,7 @@ def calc_mental_resilience_score(stress_score: int, mood_score: int, social_hour
         if exercise_minutes >= 30:
             resilience += 1
     
-    return max(1, min(10, resilience))
+    return _clamp_1_10(resilience)
 
 
 # ============================================================================
@@ -808,20 +867,17 @@ def calc_loneliness_risk_index(social_hours: float, mood_score: int) -> Optional
     
     # Base risk from social hours
     if social_hours < 0.5:
-        risk = "high"
+        level = _HIGH
     elif social_hours < 1.5:
-        risk = "moderate"
+        level = _MODERATE
     else:
-        risk = "low"
+        level = _LOW
     
-    # Adjust for mood
+    # Adjust for mood (one level up)
     if mood_score is not None and mood_score <= 2:
-        if risk == "moderate":
-            risk = "high"
-        elif risk == "low":
-            risk = "moderate"
+        level = min(level + 1, _HIGH)
     
-    return risk
+    return _RISK_LEVELS[level]
 
 
 def calc_social_wellness_score(social_hours: float, mood_score: int, stress_score: int) -> Optional[int]:
@@ -865,7 +921,7 @@ def calc_social_wellness_score(social_hours: float, mood_score: int, stress_scor
         elif stress_score >= 7:
             score -= 1
     
-    return max(1, min(10, score))
+    return _clamp_1_10(score)
 
 
 # ============================================================================
@@ -937,23 +993,18 @@ def calc_liver_stress_indicator(alcohol_units: int, bmi: Optional[float] = None)
         return None
     
     # Alcohol-based assessment
-    if alcohol_units == 0:
-        risk = "low"
-    elif alcohol_units <= 2:
-        risk = "low"
+    if alcohol_units <= 2:
+        level = _LOW
     elif alcohol_units <= 4:
-        risk = "moderate"
+        level = _MODERATE
     else:
-        risk = "high"
+        level = _HIGH
     
-    # BMI adjustment (obesity worsens liver stress)
+    # BMI adjustment (obesity worsens liver stress, one level up)
     if bmi is not None and bmi >= 30:
-        if risk == "low":
-            risk = "moderate"
-        elif risk == "moderate":
-            risk = "high"
+        level = min(level + 1, _HIGH)
     
-    return risk
+    return _RISK_LEVELS[level]
 
 
 def calc_cardiovascular_toxin_impact(smoking_today: bool, alcohol_units: int, stress_score: int) -> Optional[int]: